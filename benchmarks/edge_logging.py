@@ -0,0 +1,38 @@
+'''
+Measure edge creation rate with debug logging disabled and enabled
+'''
+
+import io
+import logging
+import sys
+from time import perf_counter
+
+from graphviz_managed import Graph
+from graphviz_managed.logging import log
+
+
+def measure(edges_count):
+    '''Return seconds spent creating edges with >> operator'''
+    graph = Graph()
+    nodes = [graph.node(label=f'node {index}') for index in range(100)]
+    start = perf_counter()
+    for index in range(edges_count // 3):
+        nodes[index % 100] >> nodes[(index + 1) % 100] >> nodes[(index + 2) % 100]
+        nodes[index % 100] >> [nodes[(index + 3) % 100]]
+    return perf_counter() - start
+
+
+def main():
+    edges_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    handler = logging.StreamHandler(io.StringIO())
+    log.addHandler(handler)
+    log.propagate = False
+    for level in (logging.WARNING, logging.DEBUG):
+        log.setLevel(level)
+        seconds = measure(edges_count)
+        name = logging.getLevelName(level)
+        print(f'{name:>10}: {edges_count / seconds:12,.0f} edges/s ({seconds:.3f}s)')
+
+
+if __name__ == '__main__':
+    main()
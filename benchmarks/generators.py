@@ -0,0 +1,108 @@
+'''
+Seeded generators of synthetic graphs with realistic shapes
+
+Each generator builds a graph with the requested number of edges using the
+public API (node() and edge() calls), the same output for the same seed.
+'''
+
+from random import Random
+
+from graphviz_managed import Graph
+from graphviz_managed.custom import WrapLongLabelNode
+
+
+WORDS = (
+    'service', 'gateway', 'database', 'cache', 'queue', 'worker', 'scheduler',
+    'frontend', 'backend', 'storage', 'replica', 'primary', 'metrics', 'auth',
+    'billing', 'search', 'index', 'proxy', 'balancer', 'notification',
+)
+
+KINDS = (
+    'aws.compute.EC2',
+    'aws.compute.Lambda',
+    'aws.database.RDS',
+    'aws.network.ELB',
+    'aws.storage.S3',
+    'onprem.queue.Kafka',
+)
+
+
+def fan_out(edges, seed=0):
+    '''A few hubs with a very large number of children each'''
+    random = Random(seed)
+    graph = Graph(label='Fan out', rankdir='LR')
+    hubs = [graph.node(label=f'hub {index}', shape='box') for index in range(max(edges // 1000, 1))]
+    for index in range(edges):
+        leaf = graph.node(label=f'leaf {index}')
+        graph.edge(random.choice(hubs), leaf)
+    return graph
+
+
+def chain(edges, seed=0):
+    '''A single path: deep graph with long ranks'''
+    graph = Graph(label='Chain')
+    previous = graph.node(label='step 0')
+    for index in range(edges):
+        current = graph.node(label=f'step {index + 1}')
+        graph.edge(previous, current)
+        previous = current
+    return graph
+
+
+def dense_dag(edges, seed=0):
+    '''Acyclic graph with few nodes and many edges between them'''
+    random = Random(seed)
+    graph = Graph(label='Dense DAG')
+    count = max(int((2 * edges) ** 0.5), 2)
+    nodes = [graph.node(label=f'task {index}') for index in range(count)]
+    for _ in range(edges):
+        start, end = sorted(random.sample(range(count), 2))
+        graph.edge(nodes[start], nodes[end], color='gray')
+    return graph
+
+
+def duplicate_labels(edges, seed=0):
+    '''Many nodes sharing a handful of labels (node name collisions)'''
+    random = Random(seed)
+    graph = Graph(label='Duplicate labels')
+    nodes = [graph.node(label=random.choice(WORDS[:5])) for _ in range(max(edges // 4, 2))]
+    for _ in range(edges):
+        graph.edge(random.choice(nodes), random.choice(nodes))
+    return graph
+
+
+def long_labels(edges, seed=0):
+    '''Nodes with long multi-word labels wrapped by WrapLongLabelNode'''
+    random = Random(seed)
+    graph = Graph(node_cls=WrapLongLabelNode, label='Long labels', node_attrs=dict(shape='box'))
+    nodes = [
+        graph.node(label=' '.join(random.choice(WORDS) for _ in range(random.randint(4, 16))) + f' {index}')
+        for index in range(max(edges // 4, 2))
+    ]
+    for _ in range(edges):
+        graph.edge(random.choice(nodes), random.choice(nodes))
+    return graph
+
+
+def diagram(edges, seed=0):
+    '''Diagram with icon nodes (requires diagrams package)'''
+    from graphviz_managed.diagrams import Diagram
+    random = Random(seed)
+    graph = Diagram(label='Diagram')
+    nodes = [
+        graph.node(kind=random.choice(KINDS), label=f'{random.choice(WORDS)} {index}')
+        for index in range(max(edges // 4, 2))
+    ]
+    for _ in range(edges):
+        graph.edge(random.choice(nodes), random.choice(nodes))
+    return graph
+
+
+GENERATORS = {
+    'fan_out': fan_out,
+    'chain': chain,
+    'dense_dag': dense_dag,
+    'duplicate_labels': duplicate_labels,
+    'long_labels': long_labels,
+    'diagram': diagram,
+}
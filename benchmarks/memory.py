@@ -0,0 +1,46 @@
+'''
+Measure memory footprint of graph members with tracemalloc
+'''
+
+import sys
+import tracemalloc
+
+from graphviz_managed import Graph
+
+
+def measure(build, count):
+    '''Return bytes allocated by build(count) that are still in use'''
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build(count)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def build_nodes(count):
+    graph = Graph()
+    for index in range(count):
+        graph.node(label=f'service {index}', shape='box', color='gray')
+    return graph
+
+
+def build_edges(count):
+    graph = Graph()
+    a = graph.node(label='a')
+    b = graph.node(label='b')
+    for _ in range(count):
+        graph.edge(a, b, color='gray', penwidth=0.5)
+    return graph
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, build in (('nodes', build_nodes), ('edges', build_edges)):
+        size = measure(build, count)
+        print(f'{name:>6}: {size / count * 100_000 / 2**20:8.1f} MiB per 100k ({size / count:.0f} bytes each)')
+
+
+if __name__ == '__main__':
+    main()
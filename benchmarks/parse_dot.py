@@ -0,0 +1,45 @@
+'''
+Compare dot language parsing throughput with serialization throughput of
+native writer (round trip of the same graph)
+'''
+
+import io
+import sys
+from random import Random
+from time import perf_counter
+
+from graphviz_managed import Graph
+
+
+def build(edges_count, seed=42):
+    '''Build a random graph with given number of edges'''
+    random = Random(seed)
+    graph = Graph(label='Benchmark', rankdir='LR')
+    nodes = graph.add_nodes(
+        dict(label=[f'service {index}' for index in range(max(edges_count // 4, 2))]),
+        shape='box',
+    )
+    graph.add_edges(
+        ((random.choice(nodes), random.choice(nodes)) for _ in range(edges_count)),
+        color='gray',
+    )
+    return graph
+
+
+def main():
+    edges_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    graph = build(edges_count)
+    start = perf_counter()
+    source = ''.join(graph.iter_dot())
+    write = perf_counter() - start
+    start = perf_counter()
+    parsed = Graph.from_dot(io.StringIO(source))
+    parse = perf_counter() - start
+    megabytes = len(source) / 1e6
+    print(f'{"write":>20}: {megabytes / write:8.2f} MB/s ({write:.3f}s)')
+    print(f'{"parse":>20}: {megabytes / parse:8.2f} MB/s ({parse:.3f}s)')
+    print(f'{"round trip":>20}: {"ok" if "".join(parsed.iter_dot()) == source else "FAILED"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+'''
+Compare dot language serialization throughput of native writer and
+graphviz.Digraph backend
+'''
+
+import sys
+from random import Random
+from time import perf_counter
+
+import graphviz
+from graphviz_managed import Graph
+
+
+def build(edges_count, graph_cls=None, seed=42):
+    '''Build a random graph with given number of edges'''
+    random = Random(seed)
+    graph = Graph(graph_cls=graph_cls, label='Benchmark', rankdir='LR')
+    nodes = [
+        graph.node(label=f'service {index}', shape='box')
+        for index in range(max(edges_count // 4, 2))
+    ]
+    for _ in range(edges_count):
+        graph.edge(random.choice(nodes), random.choice(nodes), color='gray')
+    return graph
+
+
+def measure(graph):
+    '''Return seconds spent rendering graph to dot language string'''
+    start = perf_counter()
+    graph.render()
+    return perf_counter() - start
+
+
+def main():
+    edges_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    backends = {
+        'native': None,
+        'graphviz.Digraph': graphviz.Digraph,
+    }
+    results = {}
+    for name, graph_cls in backends.items():
+        graph = build(edges_count, graph_cls)
+        seconds = measure(graph)
+        results[name] = seconds
+        print(f'{name:>20}: {edges_count / seconds:12,.0f} edges/s ({seconds:.3f}s)')
+    speedup = results['graphviz.Digraph'] / results['native']
+    print(f'{"speedup":>20}: {speedup:12.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+'''
+Reproducible benchmark suite: time and peak memory per phase for synthetic
+graphs of different shapes and sizes
+
+Results are saved as JSON and may be compared with results of another run
+(e.g. made on a previous commit):
+
+    $ PYTHONPATH=src python benchmarks/suite.py -o before.json
+    $ git checkout ...
+    $ PYTHONPATH=src python benchmarks/suite.py -o after.json --compare before.json
+
+Rendering with real Graphviz is optional (--layout), it is limited to smaller
+graphs because dot layout time grows much faster than everything else.
+'''
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+
+from graphviz_managed import engine
+from generators import GENERATORS
+
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def run(shape, edges, seed, layout_limit=None, memory=False):
+    '''Return measurements for a single graph'''
+    generate = GENERATORS[shape]
+    gc.collect()
+    result = dict(shape=shape, edges=edges, seconds={}, peak_bytes={})
+    seconds = result['seconds']
+
+    with _phase(result, 'build', memory):
+        graph = generate(edges, seed)
+    result['nodes'] = len(graph.nodes)
+
+    with _phase(result, 'render', memory):
+        graph.render()
+    stats = graph.last_render_stats
+    result['dot_bytes'] = stats.dot_bytes
+    for name, elapsed in stats.phases.items():
+        seconds[name] = elapsed
+
+    with _phase(result, 'rerender', memory):  # node names are reused
+        graph.render()
+
+    if layout_limit is not None and edges <= layout_limit and not memory:
+        with tempfile.TemporaryDirectory() as directory:
+            graph.render(Path(directory) / 'graph.svg')
+        seconds['layout'] = graph.last_render_stats.phases['layout']
+        result['output_bytes'] = graph.last_render_stats.output_bytes
+    return result
+
+
+class _phase:
+    '''Measure wall time (or peak traced memory) of a phase'''
+
+    def __init__(self, result, name, memory):
+        self.result = result
+        self.name = name
+        self.memory = memory
+
+    def __enter__(self):
+        if self.memory:
+            tracemalloc.reset_peak()
+            self.before, _ = tracemalloc.get_traced_memory()
+        self.started = perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.started
+        if self.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            self.result['peak_bytes'][self.name] = peak - self.before
+        else:
+            self.result['seconds'][self.name] = elapsed
+
+
+def metadata(seed):
+    '''Describe the environment results were obtained in'''
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=Path(__file__).parent,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return dict(
+        commit=commit,
+        created=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        graphviz=engine.version(),
+        seed=seed,
+    )
+
+
+def compare(results, baseline):
+    '''Print time ratios of current results to baseline (lower is better)'''
+    previous = {(item['shape'], item['edges']): item for item in baseline['results']}
+    print(f'Compared to {baseline["meta"].get("commit")} (ratio of seconds, lower is better):')
+    for item in results:
+        before = previous.get((item['shape'], item['edges']))
+        if before is None:
+            continue
+        ratios = ', '.join(
+            f'{name} {seconds / before["seconds"][name]:.2f}x'
+            for name, seconds in item['seconds'].items()
+            if before['seconds'].get(name)
+        )
+        print(f'{item["shape"]:>18} {item["edges"]:>9,}: {ratios}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shapes', nargs='+', choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES, help='number of edges')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--layout', type=int, metavar='MAX_EDGES', default=None,
+                        help='render with Graphviz dot graphs up to this size')
+    parser.add_argument('--memory', action='store_true',
+                        help='measure peak memory per phase (separate pass, tracemalloc is slow)')
+    parser.add_argument('-o', '--output', type=Path, help='save results to JSON file')
+    parser.add_argument('--compare', type=Path, metavar='BASELINE', help='JSON file of another run')
+    args = parser.parse_args()
+    if args.layout is not None and engine.version() is None:
+        parser.error('--layout requires Graphviz dot executable')
+
+    results = []
+    for shape in args.shapes:
+        for edges in args.sizes:
+            try:
+                result = run(shape, edges, args.seed, args.layout)
+            except ImportError as error:  # optional dependency of generator
+                print(f'{shape:>18}: skipped ({error})', file=sys.stderr)
+                break
+            if args.memory:
+                tracemalloc.start()
+                try:
+                    result['peak_bytes'] = run(shape, edges, args.seed, memory=True)['peak_bytes']
+                finally:
+                    tracemalloc.stop()
+            results.append(result)
+            timings = ', '.join(f'{name} {seconds:.3f}s' for name, seconds in result['seconds'].items())
+            print(f'{shape:>18} {edges:>9,}: {timings}', file=sys.stderr)
+
+    report = dict(meta=metadata(args.seed), results=results)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == '__main__':
+    main()
@@ -22,16 +22,11 @@ e >> f
 f >> [b, a]
 
 # Highlight nodes with no incoming edges
-from collections import defaultdict
-incoming_count = defaultdict(int)
-for edge in graph.edges:
-    incoming_count[edge.end] += 1
-for node in graph.nodes:
-    if incoming_count[node] == 0:
-        node.attrs.color = 'darkgreen'
-        node.attrs.fontcolor = 'darkgreen'
-        node.attrs.style = 'filled'
-        node.attrs.fillcolor = 'beige'
+for node in graph.sources():
+    node.attrs.color = 'darkgreen'
+    node.attrs.fontcolor = 'darkgreen'
+    node.attrs.style = 'filled'
+    node.attrs.fillcolor = 'beige'
 
 # ---8<--- END SAMPLE ---8<---
 
@@ -3,5 +3,32 @@ Manage Graphviz graphs in Python prior to rendering
 '''
 
 
-from .members import Graph
-from .logging import log
+# Public names are loaded on first access (see __getattr__), so that importing
+# this package is cheap for short-lived programs
+_LAZY_NAMES = {
+    'Graph': 'members',
+    'render_many': 'batch',
+    'log': 'logging',
+}
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    '''Import public names (and submodules) when they are first accessed'''
+    from importlib import import_module
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is not None:
+        value = getattr(import_module(f'.{module_name}', __name__), name)
+        globals()[name] = value
+        return value
+    if not name.startswith('_'):
+        try:
+            return import_module(f'.{name}', __name__)  # sets package attribute too
+        except ModuleNotFoundError as error:
+            if error.name != f'{__name__}.{name}':
+                raise
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,151 @@
+'''
+Export graph topology to NumPy arrays and build graphs from arrays
+
+NumPy is an optional dependency: pip install graphviz-managed[arrays]
+'''
+
+from .members import update_attrs
+
+
+class GraphArrays:
+    '''
+    Graph topology as integer arrays
+
+    Node ids are positions in graph.nodes, edge ids are positions in
+    graph.edges. Available arrays:
+
+        edge_index  -- shape (2, E): start and end node id of each edge
+        indptr      -- shape (N+1,): CSR row pointers (outgoing edges)
+        indices     -- shape (E,): CSR column indices (end node ids)
+        edge_order  -- shape (E,): edge id for each CSR position
+        node_attrs  -- dictionary of requested node attribute columns
+        edge_attrs  -- dictionary of requested edge attribute columns
+
+    Computed results may be written back with set_node_attrs() and
+    set_edge_attrs().
+    '''
+
+    def __init__(self, graph, node_attrs=(), edge_attrs=()):
+        import numpy as np
+        self.graph = graph
+        self.nodes = list(graph.nodes)
+        self.edges = list(graph.edges)
+        ids = {node: position for position, node in enumerate(self.nodes)}
+        count = len(self.edges)
+        start = np.fromiter((ids[edge.start] for edge in self.edges), dtype=np.int64, count=count)
+        end = np.fromiter((ids[edge.end] for edge in self.edges), dtype=np.int64, count=count)
+        self.edge_index = np.stack([start, end])
+        self.edge_order = np.argsort(start, kind='stable')
+        self.indices = end[self.edge_order]
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(start, minlength=len(self.nodes)), out=self.indptr[1:])
+        self.node_attrs = _columns(self.nodes, node_attrs)
+        self.edge_attrs = _columns(self.edges, edge_attrs)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self.nodes)} nodes, {len(self.edges)} edges>'
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.edges)
+
+    def set_node_attrs(self, **columns):
+        '''Set node attributes from columns indexed by node id (None removes attribute)'''
+        _write_columns(self.nodes, columns)
+
+    def set_edge_attrs(self, **columns):
+        '''Set edge attributes from columns indexed by edge id (None removes attribute)'''
+        _write_columns(self.edges, columns)
+
+
+def _columns(members, names):
+    '''
+    Collect attribute values into NumPy arrays
+
+    Names may be an iterable of attribute names (object arrays of strings,
+    None for missing values) or a mapping of names to dtypes.
+    '''
+    import numpy as np
+    if not isinstance(names, dict):
+        names = dict.fromkeys(names, object)
+    columns = {}
+    for name, dtype in names.items():
+        values = [getattr(member.attrs, name, None) for member in members]
+        columns[name] = np.array(values, dtype=dtype)
+    return columns
+
+
+def _write_columns(members, columns):
+    '''Write columns of values back to member attributes, one update per member'''
+    if not columns:
+        return
+    names = list(columns)
+    values = []
+    for name, column in columns.items():
+        if len(column) != len(members):
+            raise ValueError(f'column {name} has {len(column)} values, expected {len(members)}')
+        if hasattr(column, 'tolist'):  # convert NumPy scalars to Python objects
+            column = column.tolist()
+        values.append(column)
+    for member, row in zip(members, zip(*values)):
+        update_attrs(member.attrs, {
+            name: value if value is None or type(value) is str else str(value)
+            for name, value in zip(names, row)
+        })
+
+
+def from_arrays(graph, edge_index, num_nodes=None, node_attrs=None, edge_attrs=None):
+    '''
+    Add nodes and edges described by arrays to an empty graph
+
+    Nodes are labeled with their ids unless 'label' column is provided.
+    Attribute columns are indexed by node/edge id, None values are skipped.
+    '''
+    import numpy as np
+    edge_index = np.asarray(edge_index)
+    if edge_index.ndim != 2 or edge_index.shape[0] != 2:
+        raise ValueError(f'edge_index must have shape (2, E), got {edge_index.shape}')
+    if num_nodes is None:
+        num_nodes = int(edge_index.max()) + 1 if edge_index.size else 0
+    elif edge_index.size and edge_index.max() >= num_nodes:
+        raise ValueError(f'edge_index refers to nodes beyond num_nodes={num_nodes}')
+    node_columns = _plain_columns(node_attrs)
+    if 'label' not in node_columns:
+        node_columns['label'] = [str(node_id) for node_id in range(num_nodes)]
+    nodes = graph.add_nodes(_rows(node_columns, num_nodes))
+    edge_columns = _plain_columns(edge_attrs)
+    start, end = edge_index.tolist()
+    rows = _rows(edge_columns, len(start))
+    graph.add_edges((
+        (nodes[tail], nodes[head], row)
+        for tail, head, row in zip(start, end, rows)
+    ))
+    return graph
+
+
+def _plain_columns(columns):
+    '''Convert NumPy columns to lists of Python objects'''
+    if not columns:
+        return {}
+    return {
+        name: column.tolist() if hasattr(column, 'tolist') else list(column)
+        for name, column in columns.items()
+    }
+
+
+def _rows(columns, count):
+    '''Yield row dictionaries without None values'''
+    for name, column in columns.items():
+        if len(column) != count:
+            raise ValueError(f'column {name} has {len(column)} values, expected {count}')
+    names = list(columns)
+    if not names:
+        for _ in range(count):
+            yield {}
+        return
+    for row in zip(*columns.values()):
+        yield {name: value for name, value in zip(names, row) if value is not None}
@@ -0,0 +1,81 @@
+'''
+Render many graphs in parallel
+'''
+
+import os
+from pathlib import Path
+
+from . import engine
+from .logging import log
+
+
+class RenderResult:
+    '''Outcome of rendering a single graph in a batch'''
+
+    def __init__(self, graph, target, error=None):
+        self.graph = graph
+        self.target = target
+        self.error = error
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error!r}'
+        return f'<{self.__class__.__name__} {self.target}: {status}>'
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def render_many(graphs_and_targets, workers=None):
+    '''
+    Render (graph, filename) pairs using a bounded pool of Graphviz processes
+
+    Graphs are translated to dot language in the calling thread, layout and
+    rendering are executed by up to `workers` concurrent Graphviz processes
+    (defaults to CPU count). Output format is detected from file extension.
+
+    Errors do not abort the batch: a list of RenderResult objects is returned
+    in the same order as input, failed items have a non-empty `error`.
+    Rendering several graphs into the same file within one batch is reported
+    as an error instead of silently overwriting the results.
+    '''
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = []
+    targets = set()
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for graph, target in graphs_and_targets:
+            result = RenderResult(graph, target)
+            results.append(result)
+            output = Path(target)
+            try:
+                resolved = output.resolve()
+                if resolved in targets:
+                    raise RuntimeError(f'output file is used more than once in a batch: {target}')
+                targets.add(resolved)
+                fmt = output.suffix.lstrip('.').lower()
+                output.parent.mkdir(parents=True, exist_ok=True)
+                if fmt == 'dot':
+                    graph.render(output)
+                    continue
+                source = ''.join(graph.iter_dot())
+            except Exception as exc:
+                result.error = exc
+                continue
+            if len(pending) >= 2 * workers:  # limit the number of dot sources held in memory
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            future = pool.submit(engine.pipe, [source], fmt, output=output)
+            future.add_done_callback(lambda future, result=result: _finish(future, result))
+            pending.add(future)
+    failed = sum(1 for result in results if not result.ok)
+    log.info('Rendered %s graphs, %s failed', len(results), failed)
+    return results
+
+
+def _finish(future, result):
+    '''Save outcome of a finished rendering job'''
+    result.error = future.exception()
+    if result.error is not None:
+        log.warning('Failed to render %s: %s', result.target, result.error)
@@ -0,0 +1,125 @@
+'''
+Cache rendered graphs to avoid running Graphviz for unchanged inputs
+'''
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+from . import engine
+from .logging import log
+
+
+class RenderCache:
+    '''
+    Two-tier (memory and disk) cache of rendered graphs
+
+    Cache keys are derived from dot language source, output format and
+    Graphviz version. Least recently used entries are evicted when size
+    limits are exceeded. Disk tier is used only if directory is provided,
+    that directory should not contain any other files.
+    '''
+
+    def __init__(self, directory=None, disk_size=256 * 2**20, memory_size=64 * 2**20):
+        self.directory = Path(directory) if directory is not None else None
+        self.disk_size = disk_size
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._disk = OrderedDict()  # least recently used entries go first
+        self._disk_used = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.directory.iterdir():
+                if path.suffix == '.tmp':
+                    continue
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+            for _, key, size in sorted(entries):
+                self._disk[key] = size
+                self._disk_used += size
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} hits={self.hits}, misses={self.misses}, directory={self.directory}>'
+
+    def key(self, chunks, fmt, engine_name=engine.DEFAULT_ENGINE):
+        '''Calculate cache key for dot language source chunks'''
+        digest = hashlib.sha256()
+        digest.update(f'{engine.version(engine_name)}\0{engine_name}\0{fmt}\0'.encode())
+        for chunk in chunks:
+            digest.update(chunk.encode(engine.ENCODING))
+        return digest.hexdigest()
+
+    def get(self, key):
+        '''Return cached bytes for a given key or None'''
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+        if self.directory is not None and key in self._disk:
+            path = self.directory / key
+            try:
+                if data is None:
+                    data = path.read_bytes()
+                    self._remember(key, data)
+                os.utime(path)  # mark as recently used for other processes
+                self._disk.move_to_end(key)
+            except FileNotFoundError:
+                self._disk_used -= self._disk.pop(key)
+        if data is None:
+            self.misses += 1
+            log.debug('Render cache miss: %s', key)
+        else:
+            self.hits += 1
+            log.debug('Render cache hit: %s', key)
+        return data
+
+    def put(self, key, data):
+        '''Save rendered bytes to cache'''
+        self._remember(key, data)
+        if self.directory is None or len(data) > self.disk_size:
+            return
+        if key in self._disk:
+            return
+        path = self.directory / key
+        temporary = path.with_name(f'{key}.{os.getpid()}.tmp')
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        self._disk[key] = len(data)
+        self._disk_used += len(data)
+        while self._disk_used > self.disk_size:
+            evicted, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                (self.directory / evicted).unlink()
+            except FileNotFoundError:
+                pass
+            log.debug('Evicted from render cache: %s', evicted)
+
+    def clear(self):
+        '''Remove all cached entries'''
+        self._memory.clear()
+        self._memory_used = 0
+        for key in self._disk:
+            try:
+                (self.directory / key).unlink()
+            except FileNotFoundError:
+                pass
+        self._disk.clear()
+        self._disk_used = 0
+
+    def _remember(self, key, data):
+        '''Save data to memory tier'''
+        if len(data) > self.memory_size:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_size:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
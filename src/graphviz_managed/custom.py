@@ -2,20 +2,91 @@
 Applying some customizations to basic graph members
 '''
 
+import re
+from functools import lru_cache
 from textwrap import wrap
 from .members import Node
 
+
+# Labels made of printable ASCII characters except hyphens: textwrap splits
+# them at spaces only, so a simpler algorithm produces the same lines
+SIMPLE_LABEL = re.compile(r'[ -,.-~]*')
+SPACES = re.compile(r'( +)')
+
+
+@lru_cache(maxsize=4096)
+def wrap_label(label, width):
+    '''
+    Break label into lines (dot language escaped newlines)
+
+    Output is the same as of textwrap.wrap(break_long_words=False). Results
+    are memoized: graphs often repeat the same long labels.
+    '''
+    if SIMPLE_LABEL.fullmatch(label):
+        lines = _wrap_simple(label, width)
+    else:
+        lines = wrap(label, width=width, break_long_words=False)
+    return r'\n'.join(lines)
+
+
+def _wrap_simple(text, width):
+    '''Greedy wrapping of text split at spaces, same as in textwrap'''
+    chunks = [chunk for chunk in SPACES.split(text) if chunk]
+    chunks.reverse()
+    lines = []
+    while chunks:
+        if lines and chunks[-1][0] == ' ':  # drop whitespace at line start
+            chunks.pop()
+        line = []
+        length = 0
+        while chunks and length + len(chunks[-1]) <= width:
+            chunk = chunks.pop()
+            line.append(chunk)
+            length += len(chunk)
+        if chunks and not line:  # word longer than width gets a line of its own
+            line.append(chunks.pop())
+        if line and line[-1][0] == ' ':  # drop whitespace at line end
+            line.pop()
+        if line:
+            lines.append(''.join(line))
+    return lines
+
+
 class WrapLongLabelNode(Node):
-    '''Graph node which automatically breaks long labels into multiple lines'''
+    '''
+    Graph node which automatically breaks long labels into multiple lines
+
+    Labels are wrapped on node creation by default. If DEFER_WRAPPING is
+    enabled, labels are wrapped right before the first render instead (see
+    Graph.defer), so that passes which rewrite labels work with the original
+    text and each label is wrapped only once.
+    '''
+
+    __slots__ = ('_wrapped',)
 
     LABEL_LINE_LENGTH = 20
+    DEFER_WRAPPING = False
 
     def __init__(self, graph, **attrs):
-        label = attrs.get('label', '')
-        if len(label) > self.LABEL_LINE_LENGTH:
-            attrs['label'] = r'\n'.join(wrap(
-                label,
-                width=self.LABEL_LINE_LENGTH,
-                break_long_words=False,
-            ))
+        self._wrapped = None  # label produced by wrapping
+        if self.DEFER_WRAPPING:
+            graph.defer(_wrap_nodes, self)
+        else:
+            label = attrs.get('label', '')
+            if len(label) > self.LABEL_LINE_LENGTH:
+                attrs['label'] = self._wrapped = wrap_label(label, self.LABEL_LINE_LENGTH)
         super().__init__(graph, **attrs)
+
+    def wrap(self):
+        '''Wrap current label unless it was wrapped already, return True if changed'''
+        label = getattr(self.attrs, 'label', '')
+        if len(label) <= self.LABEL_LINE_LENGTH or label == getattr(self, '_wrapped', None):
+            return False
+        self.attrs.label = self._wrapped = wrap_label(label, self.LABEL_LINE_LENGTH)
+        return True
+
+
+def _wrap_nodes(nodes):
+    '''Wrap labels of nodes that deferred wrapping (see Graph.defer)'''
+    for node in nodes:
+        node.wrap()
@@ -4,9 +4,11 @@ Wrap diagrams package for pre-processing
 https://diagrams.mingrammer.com/
 '''
 
-import diagrams
+import ast
+import json
+import os
 from importlib import import_module
-from .members import Graph, Node, Edge
+from .members import Graph, Node, Edge, DotSource, dot_attr_list, dot_quote
 try:
     from functools import cache
 except ImportError: # Python < 3.9
@@ -16,6 +18,9 @@ except ImportError: # Python < 3.9
 
 class DiagramNode(Node):
     '''Wrap diagrams members for pre-processing'''
+
+    __slots__ = ('kind',)
+
     def __init__(self, graph, kind='k8s.compute.Pod', package='diagrams', **attrs):
         if package:
             self.kind = f'{package}.{kind}'
@@ -25,48 +30,283 @@ class DiagramNode(Node):
 
 
 class Diagram(Graph):
-    '''Wrap diagrams for pre-processing'''
+    '''
+    Wrap diagrams for pre-processing
+
+    By default dot language source is written directly (see DiagramSource):
+    diagrams provider modules are not imported and no diagrams objects are
+    created. Pass graph_cls=diagrams.Diagram to build the output with diagrams
+    package itself.
+    '''
+
+    # Registry used to look up icons for node kinds. Replace with
+    # KindRegistry(path) to reuse lookup results between processes
+    KINDS = None
+
     def __init__(self,
-                 graph_cls=diagrams.Diagram,
+                 graph_cls=None,
                  node_cls=DiagramNode,
                  node_attrs=None,
                  edge_cls=Edge,
                  edge_attrs=None,
                  **attrs):
+        import diagrams  # fail early if optional dependency is not installed
         super().__init__(graph_cls, node_cls, node_attrs, edge_cls, edge_attrs, **attrs)
 
     def _make_foreign_graph(self):
-        class_attr_names = {
-            'name',
-            'filename',
-            'direction',
-            'curvestyle',
-            'outformat',
-            'show',
-            'graph_attr',
-            'node_attr',
-            'edge_attr',
-        }
-        attrs = vars(self.attrs)
-        class_attrs = dict()
-        for name in class_attr_names:
-            if name in attrs:
-                class_attrs[name] = attrs.pop(name)
+        if self._graph_cls is None:
+            return DiagramSource(self)
+        import diagrams
+        class_attrs, attrs = _split_class_attrs(vars(self.attrs))
         diag = self._graph_cls(**class_attrs, graph_attr=attrs)
-        diag.__enter__()
-        foreign_nodes = dict()
-        for node in self.nodes:
-            cls = load_class(node.kind)
-            foreign_nodes[node] = cls(**vars(node.attrs))
-        for edge in self.edges:
-            foreign_nodes[edge.start] >> foreign_nodes[edge.end]
+        previous = diagrams.getdiagram()
+        diagrams.setdiagram(diag)
+        try:
+            foreign_nodes = dict()
+            for node in self.nodes:
+                cls = load_class(node.kind)
+                foreign_nodes[node] = cls(**vars(node.attrs))
+            for edge in self.edges:
+                foreign_nodes[edge.start] >> diagrams.Edge(**vars(edge.attrs)) >> foreign_nodes[edge.end]
+        finally:
+            diagrams.setdiagram(previous)
         return diag
 
     def _dot_foreign_graph(self, foreign):
+        if isinstance(foreign, DotSource):
+            return super()._dot_foreign_graph(foreign)
         return foreign.dot.source
 
     def _save_foreign_graph(self, foreign, filename, fileformat):
-        super()._save_foreign_graph(foreign.dot, filename, fileformat)
+        if isinstance(foreign, DotSource):
+            super()._save_foreign_graph(foreign, filename, fileformat)
+        else:
+            super()._save_foreign_graph(foreign.dot, filename, fileformat)
+
+
+CLASS_ATTR_NAMES = {
+    'name',
+    'filename',
+    'direction',
+    'curvestyle',
+    'outformat',
+    'autolabel',
+    'show',
+    'strict',
+    'graph_attr',
+    'node_attr',
+    'edge_attr',
+}
+
+
+def _split_class_attrs(attrs):
+    '''Separate diagrams.Diagram arguments from graph attributes'''
+    class_attrs = dict()
+    for name in CLASS_ATTR_NAMES:
+        if name in attrs:
+            class_attrs[name] = attrs.pop(name)
+    return class_attrs, attrs
+
+
+class DiagramSource(DotSource):
+    '''
+    Dot language source for Diagram, same as produced by diagrams package
+
+    Node icons are looked up in KindRegistry, node names are generated the
+    same way as for other graphs (diagrams package uses random ids).
+    '''
+
+    def __iter__(self):
+        import diagrams
+        graph = self.graph
+        kinds = graph.KINDS
+        if kinds is None:
+            kinds = Diagram.KINDS = KindRegistry()
+        class_attrs, attrs = _split_class_attrs(vars(graph.attrs))
+        name = class_attrs.get('name', '')
+        graph_attrs = dict(diagrams.Diagram._default_graph_attrs, label=name)
+        graph_attrs['rankdir'] = class_attrs.get('direction', 'LR')
+        graph_attrs['splines'] = class_attrs.get('curvestyle', 'ortho')
+        graph_attrs.update(attrs)
+        head = 'digraph'
+        if class_attrs.get('strict', 'False') != 'False':
+            head = f'strict {head}'
+        if name:
+            head = f'{head} {dot_quote(name)}'
+        autolabel = class_attrs.get('autolabel', 'False') != 'False'
+        yield f'{head} {{\n'
+        yield f'\tgraph{dot_attr_list(graph_attrs)}\n'
+        yield f'\tnode{dot_attr_list(diagrams.Diagram._default_node_attrs)}\n'
+        yield f'\tedge{dot_attr_list(diagrams.Diagram._default_edge_attrs)}\n'
+        names = graph._node_names()
+        overlay = graph._attr_overlay() or {}
+        for node in graph.nodes:
+            attrs = vars(overlay.get(node, node.attrs))
+            label = attrs.get('label', '')
+            if autolabel:
+                class_name = node.kind.rpartition('.')[2]
+                label = f'{class_name}\n{label}' if label else class_name
+            icon, height = kinds[node.kind]
+            if icon is None:
+                node_attrs = {}
+            else:
+                node_attrs = {
+                    'shape': 'none',
+                    'height': str(height + 0.4 * label.count('\n')),
+                    'image': icon,
+                }
+            node_attrs.update(attrs)
+            node_attrs['label'] = label
+            yield f'\t{dot_quote(names[node])}{dot_attr_list(node_attrs, "label", "name")}\n'
+        for edge in graph.edges:
+            edge_attrs = dict(diagrams.Edge._default_edge_attrs, dir='forward')
+            edge_attrs.update(vars(overlay.get(edge, edge.attrs)))
+            tail = dot_quote(names[edge.start])
+            head = dot_quote(names[edge.end])
+            yield f'\t{tail} -> {head}{dot_attr_list(edge_attrs, "label")}\n'
+        yield '}\n'
+
+
+class KindRegistry:
+    '''
+    Look up icons of diagrams node kinds without importing provider modules
+
+    Maps kind (e.g. 'diagrams.aws.network.ELB') to a tuple of icon path (None
+    if the kind has no icon) and node height. Class attributes are read from
+    provider module sources; modules are imported only if that fails.
+
+    If path is provided, lookup results are loaded from that JSON file and can
+    be saved there for other processes (see save()).
+    '''
+
+    def __init__(self, path=None):
+        import diagrams
+        self.path = path
+        self._kinds = dict()
+        self._basedir = os.path.dirname(os.path.dirname(os.path.abspath(diagrams.__file__)))
+        if path is not None and os.path.exists(path):
+            with open(path) as registry:
+                saved = json.load(registry)
+            for kind, (icon, height) in saved.items():
+                self._kinds[kind] = (icon, height)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self._kinds)} kinds>'
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def __getitem__(self, kind):
+        found = self._kinds.get(kind)
+        if found is None:
+            found = self._kinds[kind] = self._lookup(kind)
+        icon, height = found
+        if icon is not None:
+            icon = os.path.join(self._basedir, icon)
+        return icon, height
+
+    def save(self, path=None):
+        '''Save lookup results to JSON file'''
+        if path is None:
+            path = self.path
+        with open(path, 'w') as registry:
+            json.dump(self._kinds, registry, indent=2, sort_keys=True)
+
+    def _lookup(self, kind):
+        '''Return icon path (relative to diagrams installation) and node height'''
+        module_name, _, class_name = kind.rpartition('.')
+        try:
+            icon_dir, icon, height = (
+                _static_class_attr(module_name, class_name, attr)
+                for attr in ('_icon_dir', '_icon', '_height')
+            )
+        except LookupError:
+            cls = load_class(kind)
+            icon_dir, icon, height = cls._icon_dir, cls._icon, cls._height
+        if not icon:
+            return None, height
+        return os.path.join(icon_dir, icon), height
+
+
+def _static_class_attr(module_name, class_name, attr):
+    '''
+    Find class attribute value in module source code without importing it
+
+    Base classes are followed within diagrams package, LookupError is raised
+    if the value can not be determined statically.
+    '''
+    import diagrams
+    if module_name == 'diagrams' and class_name == 'Node':
+        return getattr(diagrams.Node, attr)
+    classes, aliases, imports = _parse_module(module_name)
+    class_name = aliases.get(class_name, class_name)
+    if class_name in classes:
+        bases, attrs = classes[class_name]
+        if attr in attrs:
+            return attrs[attr]
+        for base in bases:
+            try:
+                return _static_class_attr(module_name, base, attr)
+            except LookupError:
+                continue
+    elif class_name in imports:
+        return _static_class_attr(*imports[class_name], attr)
+    raise LookupError(f'can not find {module_name}.{class_name}.{attr}')
+
+
+@cache
+def _parse_module(module_name):
+    '''
+    Extract class definitions, aliases and imported names from module source
+
+    Only modules within diagrams package are supported.
+    '''
+    import diagrams
+    package, *parts = module_name.split('.')
+    if package != 'diagrams':
+        raise LookupError(f'not a diagrams module: {module_name}')
+    path = os.path.join(os.path.dirname(os.path.abspath(diagrams.__file__)), *parts)
+    is_package = os.path.isdir(path)
+    if is_package:
+        path = os.path.join(path, '__init__.py')
+    else:
+        path += '.py'
+    try:
+        with open(path, encoding='utf-8') as source:
+            tree = ast.parse(source.read(), path)
+    except (OSError, SyntaxError) as exc:
+        raise LookupError(f'can not parse {module_name}: {exc}')
+    classes, aliases, imports = dict(), dict(), dict()
+    for statement in tree.body:
+        if isinstance(statement, ast.ClassDef):
+            bases = [base.id for base in statement.bases if isinstance(base, ast.Name)]
+            attrs = dict()
+            for item in statement.body:
+                if isinstance(item, ast.Assign) \
+                and isinstance(item.value, ast.Constant) \
+                and len(item.targets) == 1 \
+                and isinstance(item.targets[0], ast.Name):
+                    attrs[item.targets[0].id] = item.value.value
+            classes[statement.name] = (bases, attrs)
+        elif isinstance(statement, ast.Assign) \
+        and isinstance(statement.value, ast.Name):
+            for target in statement.targets:
+                if isinstance(target, ast.Name):
+                    aliases[target.id] = statement.value.id
+        elif isinstance(statement, ast.ImportFrom):
+            if statement.level:
+                base = module_name.split('.')
+                if not is_package:
+                    base = base[:-1]
+                if statement.level > 1:
+                    base = base[:-(statement.level - 1)]
+                source_module = '.'.join(base + ([statement.module] if statement.module else []))
+            else:
+                source_module = statement.module
+            for alias in statement.names:
+                imports[alias.asname or alias.name] = (source_module, alias.name)
+    return classes, aliases, imports
+
 
 @cache
 def load_class(kind: str):
@@ -0,0 +1,187 @@
+'''
+Run Graphviz layout engines without intermediate files
+'''
+
+import io
+import os
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+
+# subprocess, threading and asyncio are imported by the functions that need
+# them, so that importing this module stays cheap
+
+from .logging import log
+
+
+DEFAULT_ENGINE = 'dot'
+ENCODING = 'utf-8'
+
+# Maximum number of concurrent Graphviz processes started by pipe_async()
+# within each event loop. May be changed at any time: processes started
+# after the change follow the new limit
+ASYNC_LIMIT = os.cpu_count() or 1
+
+
+def pipe(lines, fmt, output=None, engine=DEFAULT_ENGINE, timeout=None, args=()):
+    '''
+    Feed dot language source to Graphviz engine line by line via stdin
+
+    If output path is provided, the engine writes rendered result directly to
+    that file and this function returns None. Otherwise rendered result is
+    returned as bytes.
+
+    Source lines are consumed lazily, so memory usage does not depend on graph
+    size (unless rendered result is returned as bytes).
+
+    Engine process is killed and TimeoutError is raised if rendering takes
+    longer than timeout (seconds).
+
+    Extra command line arguments (e.g. more -T/-o pairs to save several
+    outputs of the same layout) are appended to the engine command.
+    '''
+    import subprocess
+    from threading import Event, Thread, Timer
+    command = [engine, f'-T{fmt}']
+    if output is not None:
+        command.append(f'-o{output}')
+    command.extend(args)
+    log.debug('Starting Graphviz process: %s', command)
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    stdout, stderr = [], []
+    readers = [
+        Thread(target=_drain, args=(process.stdout, stdout), daemon=True),
+        Thread(target=_drain, args=(process.stderr, stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    expired = Event()
+    if timeout is not None:
+        timer = Timer(timeout, _expire, args=(process, expired))
+        timer.daemon = True
+        timer.start()
+    stdin = io.TextIOWrapper(process.stdin, encoding=ENCODING)
+    try:
+        stdin.writelines(lines)
+        stdin.close()
+    except BrokenPipeError:  # engine has exited early, error is reported below
+        try:
+            stdin.close()
+        except BrokenPipeError:
+            pass
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    returncode = process.wait()
+    if timeout is not None:
+        timer.cancel()
+    for reader in readers:
+        reader.join()
+    if expired.is_set() and returncode != 0:
+        raise TimeoutError(f'Graphviz {engine} did not finish in {timeout} seconds')
+    if returncode != 0:
+        message = b''.join(stderr).decode(ENCODING, errors='replace').strip()
+        raise RuntimeError(f'Graphviz {engine} exited with code {returncode}: {message}')
+    if output is None:
+        return b''.join(stdout)
+
+
+def _expire(process, expired):
+    '''Kill engine process that has exceeded its time budget'''
+    expired.set()
+    process.kill()
+
+
+def _drain(stream, chunks):
+    '''Read binary stream into a list of chunks until EOF'''
+    with stream:
+        for chunk in iter(lambda: stream.read(io.DEFAULT_BUFFER_SIZE), b''):
+            chunks.append(chunk)
+
+
+_async_semaphores = WeakKeyDictionary()  # loop -> (limit, semaphore)
+
+async def pipe_async(lines, fmt, output=None, engine=DEFAULT_ENGINE, timeout=None, semaphore=None):
+    '''
+    Asyncio version of pipe(): feed dot language source to Graphviz engine
+
+    Engine process is killed and asyncio.TimeoutError is raised if rendering
+    takes longer than timeout (seconds). Number of concurrent processes is
+    limited by ASYNC_LIMIT, or by semaphore (asyncio.Semaphore) if provided:
+    calls sharing a semaphore share its limit.
+    '''
+    import asyncio
+    if semaphore is None:
+        loop = asyncio.get_running_loop()
+        limit, semaphore = _async_semaphores.get(loop, (None, None))
+        if limit != ASYNC_LIMIT:
+            semaphore = asyncio.Semaphore(ASYNC_LIMIT)
+            _async_semaphores[loop] = (ASYNC_LIMIT, semaphore)
+    async with semaphore:
+        command = [engine, f'-T{fmt}']
+        if output is not None:
+            command.append(f'-o{output}')
+        log.debug('Starting Graphviz process: %s', command)
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(_communicate(process, lines), timeout)
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+    if process.returncode != 0:
+        message = stderr.decode(ENCODING, errors='replace').strip()
+        raise RuntimeError(f'Graphviz {engine} exited with code {process.returncode}: {message}')
+    if output is None:
+        return stdout
+
+
+async def _communicate(process, lines):
+    '''Write source lines to process stdin while reading its output'''
+    import asyncio
+    stdout = asyncio.ensure_future(process.stdout.read())
+    stderr = asyncio.ensure_future(process.stderr.read())
+    try:
+        chunk = []
+        chunk_size = 0
+        for line in lines:
+            chunk.append(line)
+            chunk_size += len(line)
+            if chunk_size >= io.DEFAULT_BUFFER_SIZE:
+                process.stdin.write(''.join(chunk).encode(ENCODING))
+                await process.stdin.drain()
+                chunk.clear()
+                chunk_size = 0
+        process.stdin.write(''.join(chunk).encode(ENCODING))
+        await process.stdin.drain()
+        process.stdin.close()
+    except (BrokenPipeError, ConnectionResetError):  # engine has exited early
+        pass
+    except BaseException:
+        stdout.cancel()
+        stderr.cancel()
+        raise
+    await process.wait()
+    return await stdout, await stderr
+
+
+@lru_cache(maxsize=None)
+def version(engine=DEFAULT_ENGINE):
+    '''Return version string reported by Graphviz engine (None if not installed)'''
+    import subprocess
+    try:
+        process = subprocess.run([engine, '-V'], capture_output=True)
+    except OSError:
+        return None
+    return process.stderr.decode(ENCODING, errors='replace').strip()
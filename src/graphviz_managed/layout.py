@@ -0,0 +1,125 @@
+'''
+Reuse node positions computed by Graphviz between renders
+
+Full layout of a large graph is slow, and even small changes make the picture
+jump around. Layout remembers node positions after each render, later renders
+pin the known nodes to their previous positions: if all nodes are known,
+neato only routes the edges (neato -n), otherwise new nodes are placed around
+the pinned ones (neato -s).
+'''
+
+import json
+import re
+import tempfile
+from pathlib import Path
+
+from . import engine
+from .logging import log
+from .members import update_attrs
+
+
+POINTS_PER_INCH = 72
+
+# Node line of -Tplain output: node name x y width height ...
+PLAIN_NODE = re.compile(r'node ("(?:[^"\\]|\\.)*"|\S+) (\S+) (\S+) ')
+
+
+class Layout:
+    '''
+    Node positions (in points) keyed by node name
+
+    engine -- layout engine used when there are no known positions yet
+    pin_engine -- engine that supports pinned positions (neato)
+    path -- optional sidecar JSON file: positions are loaded from it and saved
+            to it after each render
+
+    Positions are matched by dot language node names (explicit name
+    attribute or the name derived from label), so renaming a node makes it a
+    new one. Positions of nodes that were removed from the graph are
+    forgotten after the next render.
+    '''
+
+    def __init__(self, engine=engine.DEFAULT_ENGINE, path=None, pin_engine='neato'):
+        self.engine = engine
+        self.pin_engine = pin_engine
+        self.path = Path(path) if path is not None else None
+        self.positions = {}
+        if self.path is not None and self.path.exists():
+            saved = json.loads(self.path.read_text())
+            self.positions = {name: tuple(position) for name, position in saved['positions'].items()}
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self.positions)} positions, path={self.path}>'
+
+    def __len__(self):
+        return len(self.positions)
+
+    def save(self, path=None):
+        '''Save positions to a sidecar JSON file'''
+        path = Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError('no path to save layout to')
+        path.write_text(json.dumps(dict(positions=self.positions)))
+
+    def pin(self, graph):
+        '''
+        Prepare graph for rendering with known positions
+
+        Returns (graph to render, engine, extra engine arguments). Original
+        graph is not modified: known positions are set on a copy.
+        '''
+        names = graph._node_names()
+        known = sum(1 for node in graph.nodes if names[node] in self.positions)
+        if not known:
+            return graph, self.engine, ()
+        from .reduce import copy_graph
+        pinned = copy_graph(graph)
+        for original, node in zip(graph.nodes, pinned.nodes):
+            position = self.positions.get(names[original])
+            if position is not None:
+                update_attrs(node.attrs, {'pos': f'{position[0]:g},{position[1]:g}!'})
+        if getattr(graph.attrs, 'splines', None) is None:
+            pinned.attrs.splines = 'true'  # curved edges, like dot draws them
+        if known == len(graph.nodes):
+            log.debug('All %s node positions are known, routing edges only', known)
+            return pinned, self.pin_engine, ('-n',)
+        log.debug('Pinning %s of %s nodes', known, len(graph.nodes))
+        return pinned, self.pin_engine, ('-s',)
+
+    def capture(self, plain, names):
+        '''Replace positions with the ones from Graphviz -Tplain output'''
+        wanted = set(names)
+        positions = {}
+        for match in PLAIN_NODE.finditer(plain):
+            name, x, y = match.groups()
+            if name.startswith('"'):
+                name = name[1:-1].replace('\\"', '"')
+            if name in wanted:
+                positions[name] = (float(x) * POINTS_PER_INCH, float(y) * POINTS_PER_INCH)
+        self.positions = positions
+
+    def render(self, graph, filename, fmt, timeout=None, stats=None):
+        '''
+        Render graph reusing known positions, then remember the new ones
+
+        Returns the name of engine that was used. Dot source size and
+        serialization time are added to stats (RenderStats) if provided.
+        '''
+        source, name, args = self.pin(graph)
+        lines = source.iter_dot()
+        if stats is not None:
+            lines = stats.measure(lines)
+        with tempfile.TemporaryDirectory() as directory:
+            plain = Path(directory) / 'layout.plain'
+            engine.pipe(
+                lines,
+                fmt,
+                output=filename,
+                engine=name,
+                timeout=timeout,
+                args=(*args, '-Tplain', f'-o{plain}'),
+            )
+            self.capture(plain.read_text(encoding=engine.ENCODING), graph._node_names().values())
+        if self.path is not None:
+            self.save()
+        return name
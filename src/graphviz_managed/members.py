@@ -3,17 +3,37 @@ Graph members
 '''
 
 
-import graphviz
+import io
 import re
-from argparse import Namespace
+import sys
+from collections.abc import MutableSequence
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
 
+from . import engine
 from .logging import log
+from .metrics import RenderStats
+from .style import RuleSheet
+
+
+# Quoting rules are copied from graphviz package to produce identical output
+# https://github.com/xflr6/graphviz/blob/master/graphviz/quoting.py
+HTML_STRING = re.compile(r'<.*>$', re.DOTALL)
+ID = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$')
+KEYWORDS = {'node', 'edge', 'graph', 'digraph', 'subgraph', 'strict'}
+QUOTE_WITH_OPTIONAL_BACKSLASHES = re.compile(r'''
+    (?P<escaped_backslashes>(?:\\{2})*)
+    \\?  # treat \" same as "
+    (?P<literal_quote>")
+    ''', flags=re.VERBOSE)
 
 
 class Edge:
     '''Graph edge'''
 
+    __slots__ = ('start', 'end', 'connector', 'attrs')
+
     def __init__(self, start, end, connector=None, **attrs):
         if connector is None:
             connector = end
@@ -30,36 +50,60 @@ class Edge:
 
     def __rshift__(self, other):
         '''self >> other'''
-        log.debug(f'rshift {self} >> {other}')
+        log.debug('rshift %s >> %s', self, other)
         return self.connector >> other
 
     def __lshift__(self, other):
         '''self << other'''
-        log.debug(f'lshift {self} << {other}')
+        log.debug('lshift %s << %s', self, other)
         return self.connector << other
 
     def __rrshift__(self, other):
         '''other >> self'''
-        log.debug(f'rrshift {other} >> {self}')
+        log.debug('rrshift %s >> %s', other, self)
         return other >> self.connector
 
     def __rlshift__(self, other):
         '''other << self'''
-        log.debug(f'rlshift {other} << {self}')
+        log.debug('rlshift %s << %s', other, self)
         return other << self.connector
 
 
 class Node:
     '''Graph node'''
 
+    __slots__ = ('graph', 'attrs', '_incoming', '_outgoing')
+
     def __init__(self, graph, **attrs):
         self.graph = graph
         self.attrs = parse_attrs(attrs)
+        self._incoming = ()  # replaced with a list when the first edge is added (see _unlink)
+        self._outgoing = ()
         log.debug('Initialized %s', self)
 
     def __repr__(self):
         return f'<{self.__class__.__name__} attrs={self.attrs}>'
 
+    @property
+    def incoming(self):
+        '''List of edges ending at this node'''
+        return list(self._incoming)
+
+    @property
+    def outgoing(self):
+        '''List of edges starting at this node'''
+        return list(self._outgoing)
+
+    @property
+    def in_degree(self):
+        '''Number of incoming edges'''
+        return len(self._incoming)
+
+    @property
+    def out_degree(self):
+        '''Number of outgoing edges'''
+        return len(self._outgoing)
+
     def connect(self, other, reverse=False, **attrs):
         '''Connect to other Node or list of Nodes'''
         if isinstance(other, list):
@@ -87,28 +131,44 @@ class Node:
 
     def __rshift__(self, other):
         '''self >> other'''
-        log.debug(f'rshift {self} >> {other}')
+        log.debug('rshift %s >> %s', self, other)
         return self.connect(other)
 
     def __lshift__(self, other):
         '''self << other'''
-        log.debug(f'lshift {self} << {other}')
+        log.debug('lshift %s << %s', self, other)
         return self.connect(other, reverse=True)
 
     def __rrshift__(self, other):
         '''other >> self'''
-        log.debug(f'rrshift {other} >> {self}')
+        log.debug('rrshift %s >> %s', other, self)
         return self.connect(other, reverse=True)
 
     def __rlshift__(self, other):
         '''other << self'''
-        log.debug(f'rlshift {other} << {self}')
+        log.debug('rlshift %s << %s', other, self)
         return self.connect(other)
 
 
 class Graph:
     '''Graph object'''
 
+    # Node name collisions are resolved by adding numeric suffixes (foo_1,
+    # foo_2, ...). Set to 'underscore' to produce names compatible with older
+    # versions of this library (foo_, foo__, ...)
+    NODE_NAMING = 'counter'
+
+    # Keep serialized dot lines of graph members between renders, so that
+    # only modified members are serialized again (see DotSource). Cached
+    # lines take several times more memory than the dot source itself, and
+    # re-rendering an unmodified graph is not faster than serializing it
+    # again: enable for graphs that are rendered repeatedly with few changes
+    # in between (e.g. interactive editing of large graphs)
+    CACHE_DOT_FRAGMENTS = False
+
+    # Members with work postponed until rendering: {hook: [members]}, see defer()
+    _deferred = None
+
     def __init__(self,
                  graph_cls=None,
                  node_cls=Node,
@@ -117,46 +177,145 @@ class Graph:
                  edge_attrs=None,
                  **attrs):
         self.attrs = parse_attrs(attrs)
-        self._graph_cls = graphviz.Digraph if graph_cls is None else graph_cls
+        self._graph_cls = graph_cls  # None means native dot writer (DotSource)
         self._node_cls = node_cls
         self._node_attrs = node_attrs if node_attrs is not None else {}
         self._edge_cls = edge_cls
         self._edge_attrs = edge_attrs if edge_attrs is not None else {}
-        self.nodes = []
-        self.edges = []
+        self.nodes = MemberList()
+        self.edges = EdgeList()
+        self._dot_fragments = None  # not rendered yet
+        self._names_cache = None
+        self._styles = RuleSheet()  # pending rules, see style()
+        self.last_render_report = None  # see RenderPolicy
+        self.last_render_stats = None  # see metrics.RenderStats
         log.debug('Initialized %s', self)
 
     def __repr__(self):
         return f'<{self.__class__.__name__} with {len(self.nodes)} nodes, {len(self.edges)} edges>'
 
+    @property
+    def nodes(self):
+        '''Graph nodes in order of addition (see MemberList)'''
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, members):
+        self._nodes = members if isinstance(members, MemberList) else MemberList(members)
+
+    @property
+    def edges(self):
+        '''Graph edges in order of addition (see EdgeList)'''
+        return self._edges
+
+    @edges.setter
+    def edges(self, members):
+        members = list(members)  # may be the current list
+        current = self.__dict__.get('_edges')
+        if current is not None:
+            current.clear()
+        self._edges = EdgeList(members)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_dot_fragments'] = None  # render caches are not worth saving
+        state['_names_cache'] = None
+        return state
+
     def _make_foreign_graph(self):
-        '''Translate this object into a foreign graph object for rendering'''
+        '''
+        Translate this object into a foreign graph object for rendering
+
+        Default backend is DotSource which writes dot language directly.
+        Any graphviz.Digraph compatible class provided as graph_cls is used as
+        a fallback backend.
+        '''
+        if self._graph_cls is None:
+            return DotSource(self)
+
+        names = self._node_names()
+        overlay = self._attr_overlay() or {}
         foreign = self._graph_cls()
         foreign.attr('graph', **vars(self.attrs))
-
-        node_names = set()
         for node in self.nodes:
-            if not hasattr(node.attrs, 'name') \
-            and hasattr(node.attrs, 'label'):
-                node.attrs.name = re.sub(r'\W', '', node.attrs.label)
-            while node.attrs.name in node_names:  # do not allow node name collisions
-                node.attrs.name += "_"
-            node_names.add(node.attrs.name)
-            foreign.node(**vars(node.attrs))
+            attrs = dict(vars(overlay.get(node, node.attrs)), name=names[node])
+            foreign.node(**attrs)
         for edge in self.edges:
             foreign.edge(
-                tail_name=edge.start.attrs.name,
-                head_name=edge.end.attrs.name,
-                **vars(edge.attrs),
+                tail_name=names[edge.start],
+                head_name=names[edge.end],
+                **vars(overlay.get(edge, edge.attrs)),
             )
         return foreign
 
+    def _attr_overlay(self):
+        '''Return mapping of members to attrs that replace their own when rendering'''
+        return None  # see view.GraphView
+
+    def _node_names(self):
+        '''
+        Return a mapping of nodes to unique dot language names
+
+        Explicit name attribute is used if provided, otherwise the name is
+        derived from node label. Node attributes are not modified.
+
+        Result is reused while nodes list and node names/labels stay the same.
+        '''
+        cached = self._names_cache
+        if cached is not None:
+            nodes, scheme, bases, values, names = cached
+            if scheme == self.NODE_NAMING and nodes == self.nodes:
+                for index, node in enumerate(nodes):
+                    attrs = node.attrs
+                    if attrs._values is values[index]:
+                        continue
+                    if _name_base(attrs) != bases[index]:
+                        break
+                    values[index] = attrs._values
+                else:
+                    return names
+        if self.NODE_NAMING == 'counter':
+            unique = UniqueNames()
+        elif self.NODE_NAMING == 'underscore':
+            unique = UniqueNames(suffix=lambda name, count: name + '_' * count)
+        else:
+            raise ValueError(f'unsupported node naming scheme: {self.NODE_NAMING}')
+        from_label = {}
+        names = {}
+        bases = []
+        for node in self.nodes:
+            attrs = vars(node.attrs)
+            name = attrs.get('name')
+            if name is None:
+                label = attrs['label']
+                name = from_label.get(label)
+                if name is None:
+                    name = from_label[label] = re.sub(r'\W', '', label)
+            bases.append(name)
+            names[node] = unique(name)
+        values = [node.attrs._values for node in self.nodes]
+        self._names_cache = (list(self.nodes), self.NODE_NAMING, bases, values, names)
+        return names
+
     def _dot_foreign_graph(self, foreign):
         '''Return dot lang source for foreign graph'''
         return foreign.source
 
+    def _iter_foreign_graph(self, foreign):
+        '''Yield dot lang source for foreign graph in chunks'''
+        if isinstance(foreign, DotSource):
+            if foreign.stats is None:
+                yield from foreign
+            else:
+                yield from foreign.stats.measure(foreign)
+        else:
+            yield self._dot_foreign_graph(foreign)
+
     def _save_foreign_graph(self, foreign, filename, fileformat):
         '''Render foreign graph to a file on disk'''
+        if isinstance(foreign, DotSource):  # no intermediate file required
+            engine.pipe(self._iter_foreign_graph(foreign), fileformat, output=filename)
+            return
         intermediate = Path(filename).with_suffix('') # backwards compatible with pypi/graphviz==0.16
         if intermediate.exists():
             raise RuntimeError(f'intermediate Graphviz file already exists: {intermediate}')
@@ -167,38 +326,213 @@ class Graph:
             view=False,
         )
 
-    def render(self, filename=None, fmt=None):
+    def render(self, filename=None, fmt=None, cache=None, policy=None, layout=None):
         '''
         Render graph
 
         Output format will be autodetected based on file extension if not
         explicitly provided.
 
+        If cache (RenderCache) is provided, Graphviz is not executed for the
+        graphs that were rendered before: cached result is written instead.
+        Dot source is serialized once and kept in memory until it is hashed
+        and, on cache miss, rendered.
+
+        If policy (RenderPolicy) is provided, layout engine is chosen by graph
+        size and runaway layouts are stopped. The path taken is saved to
+        last_render_report.
+
+        If layout (layout.Layout) is provided, node positions computed by
+        Graphviz are saved to it and known nodes keep their positions in
+        later renders, so that only new nodes are laid out. Layout can not be
+        combined with cache or policy.
+
         If filename is not provided, this method will render to dot and return
         the result as string. In all other cases this method returns None.
+
+        Dot source is streamed into the file or into Graphviz process line by
+        line, no intermediate files are created for native backend.
+
+        Timings and sizes of render phases are saved to last_render_stats,
+        logged and passed to render hooks (see metrics module).
         '''
         if filename is None and fmt is None:
             fmt = 'dot'
         if filename is None and fmt != 'dot':
             raise ValueError(f'cannot render {fmt} without a filename to save to')
+        if layout is not None and (cache is not None or policy is not None):
+            raise ValueError('layout can not be combined with cache or policy')
 
+        stats = self.last_render_stats = RenderStats(self, fmt, filename)
+        try:
+            return self._render(stats, filename, fmt, cache, policy, layout)
+        except BaseException as error:
+            stats.error = error
+            raise
+        finally:
+            stats.finish(self)
+
+    def _render(self, stats, filename, fmt, cache, policy, layout):
+        '''Render graph measuring each phase, see render()'''
+        with stats.phase('styles'):
+            self._before_render()
         log.debug('Translating to foreign graph: %s', self)
-        gv = self._make_foreign_graph()
+        with stats.phase('translate'):
+            gv = self._make_foreign_graph()
+        if isinstance(gv, DotSource):
+            gv.stats = stats
 
         if fmt == 'dot' and filename is None:
             log.info('Rendering %s graph to Python string', fmt)
-            return self._dot_foreign_graph(gv)
+            with stats.phase('serialize'):
+                source = self._dot_foreign_graph(gv)
+            stats.dot_bytes = stats.output_bytes = len(source.encode(engine.ENCODING))
+            return source
 
         output = Path(filename)
         if fmt is None:
-            fmt = output.suffix.lstrip('.').lower()
+            fmt = stats.fmt = output.suffix.lstrip('.').lower()
         output.parent.mkdir(parents=True, exist_ok=True)
         log.info('Rendering %s graph to %s', fmt, filename)
         if fmt == 'dot':
-            with output.open('w') as f:
-                f.write(self._dot_foreign_graph(gv))
+            with stats.phase('write'), output.open('w') as f:
+                f.writelines(self._iter_foreign_graph(gv))
+        elif layout is not None:
+            with stats.phase('layout'):
+                stats.engine = layout.render(self, filename, fmt, stats=stats)
+        elif cache is not None:
+            with stats.phase('cache'):
+                chunks = list(self._iter_foreign_graph(gv))  # hashed and rendered from one pass
+                if policy is None:
+                    key = cache.key(chunks, fmt)
+                else:
+                    key = cache.key(chunks, fmt, policy.choose(self))
+                cached = cache.get(key)
+            stats.cached = cached is not None
+            if cached is not None:
+                with stats.phase('write'):
+                    output.write_bytes(cached)
+            else:
+                if isinstance(gv, DotSource):
+                    gv = SerializedSource(self, chunks)
+                self._render_file(gv, filename, fmt, policy, stats)
+                if policy is None or not self.last_render_report.fallback:  # retry full layout next time
+                    cache.put(key, output.read_bytes())
         else:
-            self._save_foreign_graph(gv, filename, fmt)
+            self._render_file(gv, filename, fmt, policy, stats)
+        stats.output_bytes = output.stat().st_size
+
+    def _render_file(self, foreign, filename, fmt, policy=None, stats=None):
+        '''Render foreign graph to a file on disk, following policy if provided'''
+        if stats is None:
+            stats = RenderStats(self, fmt, filename)
+        with stats.phase('layout'):
+            if policy is None:
+                self._save_foreign_graph(foreign, filename, fmt)
+                stats.engine = engine.DEFAULT_ENGINE
+            else:
+                try:
+                    policy.render(self, self._iter_foreign_graph(foreign), filename, fmt)
+                finally:
+                    stats.engine = self.last_render_report.engine
+
+    async def render_async(self, filename=None, fmt=None, timeout=None, semaphore=None):
+        '''
+        Render graph without blocking asyncio event loop
+
+        If filename is not provided, rendered result is returned as bytes
+        (svg by default), otherwise it is saved to file and None is returned.
+        Graphviz process is killed if rendering takes longer than timeout
+        (seconds). Concurrency is limited by engine.ASYNC_LIMIT, or by
+        semaphore (asyncio.Semaphore) if provided.
+        '''
+        if fmt is None:
+            fmt = 'svg' if filename is None else Path(filename).suffix.lstrip('.').lower()
+        log.info('Rendering %s graph asynchronously to %s', fmt, filename or 'bytes')
+        if fmt == 'dot':
+            source = ''.join(self.iter_dot())
+            if filename is None:
+                return source.encode(engine.ENCODING)
+            output = Path(filename)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(source)
+            return
+        if filename is not None:
+            Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        return await engine.pipe_async(
+            self.iter_dot(),
+            fmt,
+            output=filename,
+            timeout=timeout,
+            semaphore=semaphore,
+        )
+
+    def iter_dot(self):
+        '''Yield dot language source of this graph in chunks (usually lines)'''
+        self._before_render()
+        log.debug('Translating to foreign graph: %s', self)
+        yield from self._iter_foreign_graph(self._make_foreign_graph())
+
+    def write(self, stream):
+        '''
+        Write dot language source to a writable text or binary stream
+
+        Source is written incrementally without building the whole string in
+        memory. Binary streams receive UTF-8 encoded text.
+        '''
+        if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+            text = io.TextIOWrapper(stream, encoding=engine.ENCODING)
+            text.writelines(self.iter_dot())
+            text.flush()
+            text.detach()  # do not close the underlying stream
+        else:
+            stream.writelines(self.iter_dot())
+
+    def style(self, selector, **attrs):
+        '''
+        Set attributes of all members matched by selector (see style module)
+
+        Rules are not applied immediately: pending rules are applied together
+        right before rendering (or when apply_styles() is called), later rules
+        override earlier ones. A RuleSheet may be passed instead of selector.
+        '''
+        if isinstance(selector, RuleSheet):
+            if attrs:
+                raise ValueError('attributes can not be combined with a RuleSheet')
+            self._styles.extend(selector)
+        else:
+            self._styles.add(selector, **attrs)
+
+    def apply_styles(self):
+        '''Apply pending style rules, return the number of modified members'''
+        if not self._styles:
+            return 0
+        pending, self._styles = self._styles, RuleSheet()
+        log.debug('Applying %s to %s', pending, self)
+        return pending.apply(self)
+
+    def defer(self, hook, member):
+        '''
+        Postpone processing of member until the graph is rendered
+
+        Right before rendering hook is called once with the list of all
+        members deferred with it (in order of deferral).
+        '''
+        if self._deferred is None:
+            self._deferred = {}
+        pending = self._deferred.get(hook)
+        if pending is None:
+            self._deferred[hook] = [member]
+        else:
+            pending.append(member)
+
+    def _before_render(self):
+        '''Finish deferred work right before rendering: style rules, then defer() hooks'''
+        self.apply_styles()
+        while self._deferred:
+            deferred, self._deferred = self._deferred, None
+            for hook, members in deferred.items():
+                hook(members)
 
     def node(self, cls=None, **attrs):
         '''Add new node to graph'''
@@ -217,10 +551,920 @@ class Graph:
         self.edges.append(e)
         return e
 
+    def add_nodes(self, rows, cls=None, **attrs):
+        '''
+        Add many nodes to graph at once
+
+        Rows may be provided as an iterable of dictionaries (e.g. csv.DictReader)
+        or as a dictionary of columns (lists of equal length). Keyword arguments
+        are applied to all added nodes. Returns the list of new nodes.
+        '''
+        if cls is None:
+            cls = self._node_cls
+        defaults = self._node_attrs.copy()
+        defaults.update(attrs)
+        fast = cls.__init__ is Node.__init__
+        make_attrs = AttrsFactory(defaults)
+        added = []
+        for row in iter_rows(rows):
+            if fast:  # skip calling __init__ and logging for each node
+                node = cls.__new__(cls)
+                node.graph = self
+                node.attrs = make_attrs(row)
+                node._incoming = node._outgoing = ()
+            else:
+                node_attrs = defaults.copy()
+                node_attrs.update(row)
+                node = cls(graph=self, **node_attrs)
+            added.append(node)
+        self.nodes.extend(added)
+        return added
+
+    def add_edges(self, rows, nodes=None, **attrs):
+        '''
+        Add many edges to graph at once
+
+        Each row may be a (start, end) pair, a (start, end, attrs_dict) triple
+        or a dictionary with 'start' and 'end' keys and other attributes.
+        Dictionary of columns is also accepted instead of an iterable of rows.
+        If `nodes` mapping is provided, start and end values are looked up in
+        it (e.g. to resolve names read from CSV files). Keyword arguments are
+        applied to all added edges. Returns the list of new edges.
+        '''
+        cls = self._edge_cls
+        defaults = self._edge_attrs.copy()
+        defaults.update(attrs)
+        fast = cls.__init__ is Edge.__init__
+        make_attrs = AttrsFactory(defaults)
+        added = []
+        for row in iter_rows(rows):
+            if isinstance(row, dict):
+                row = row.copy()
+                start = row.pop('start')
+                end = row.pop('end')
+            else:
+                start, end, *row = row
+                row = row[0] if row else None
+            if nodes is not None:
+                start = nodes[start]
+                end = nodes[end]
+            if fast:  # skip calling __init__ and logging for each edge
+                edge = cls.__new__(cls)
+                edge.start = start
+                edge.end = edge.connector = end
+                edge.attrs = make_attrs(row)
+            else:
+                edge_attrs = defaults.copy()
+                if row:
+                    edge_attrs.update(row)
+                edge = cls(start, end, **edge_attrs)
+            added.append(edge)
+        self.edges.extend(added)
+        return added
+
+    def save(self, path):
+        '''Save graph to a compact binary snapshot file (see snapshot module)'''
+        from .snapshot import save
+        save(self, path)
+
+    @staticmethod
+    def load(path):
+        '''Load graph saved with save()'''
+        from .snapshot import load
+        return load(path)
+
+    def to_arrays(self, node_attrs=(), edge_attrs=()):
+        '''
+        Export graph topology as NumPy arrays (see arrays.GraphArrays)
+
+        Attribute names (or a mapping of names to dtypes) select which member
+        attributes are exported as columns. Requires NumPy.
+        '''
+        from .arrays import GraphArrays
+        return GraphArrays(self, node_attrs, edge_attrs)
+
+    @classmethod
+    def from_arrays(cls, edge_index, num_nodes=None, node_attrs=None, edge_attrs=None, **attrs):
+        '''
+        Create graph from an array of edges (shape 2xE) and attribute columns
+
+        Keyword arguments are passed to graph constructor. Requires NumPy.
+        '''
+        from .arrays import from_arrays
+        return from_arrays(cls(**attrs), edge_index, num_nodes, node_attrs, edge_attrs)
+
+    @classmethod
+    def from_dot(cls, source, **attrs):
+        '''
+        Create graph from dot language digraph (path or file object)
+
+        Input is parsed in a streaming fashion (see parser module), node names
+        are saved to name attribute. Keyword arguments are passed to graph
+        constructor.
+        '''
+        from .parser import parse
+        return parse(cls(**attrs), source)
+
+    def remove_edge(self, edge):
+        '''Remove edge from graph in constant time (amortized)'''
+        self._detach_edges([edge])
+
+    def remove_node(self, node):
+        '''Remove node and all its edges from graph in O(degree), return removed edges'''
+        removed = list(node._outgoing)
+        removed.extend(edge for edge in node._incoming if edge.start is not node)  # loops are outgoing too
+        self._detach_edges(removed)
+        node._incoming = node._outgoing = ()
+        self.nodes.remove(node)
+        if self._dot_fragments:
+            self._dot_fragments.pop(node, None)
+        return removed
+
+    def contract(self, node, other):
+        '''
+        Merge other node into node: edges of other are reattached to node
+
+        Edges between the two nodes are removed, attributes of other are
+        discarded. Parallel edges may appear (see merge_edges). Returns node.
+        '''
+        if node is other:
+            raise ValueError(f'can not contract node with itself: {node}')
+        between = [edge for edge in other._outgoing if edge.end is node]
+        between.extend(edge for edge in other._incoming if edge.start is node)
+        self._detach_edges(between)
+        self._move_edges(other, node)
+        self.nodes.remove(other)
+        if self._dot_fragments:
+            self._dot_fragments.pop(other, None)
+        return node
+
+    def _detach_edges(self, edges):
+        '''Remove edges from graph (and from adjacency lists, see EdgeList)'''
+        fragments = self._dot_fragments
+        for edge in edges:
+            self.edges.remove(edge)
+            if fragments:
+                fragments.pop(edge, None)
+
+    def replace(self, old, new):
+        '''
+        Put new node in place of the old one, keeping its position and edges
+
+        New node must not be a member of the graph yet (e.g. created by
+        node class directly). Returns new node.
+        '''
+        if new in self.nodes:
+            raise ValueError(f'replacement node is already in graph: {new}')
+        self.nodes.replace(old, new)
+        new.graph = self
+        new._incoming = new._outgoing = ()
+        self._move_edges(old, new)
+        if self._dot_fragments:
+            self._dot_fragments.pop(old, None)
+        return new
+
+    def _move_edges(self, source, target):
+        '''Reattach all edges of source node to target node'''
+        moved = list(source._outgoing)
+        moved.extend(edge for edge in source._incoming if edge.start is not source)
+        for edge in moved:
+            if edge.start is source:
+                edge.start = target
+                _link(target, '_outgoing', edge)
+            if edge.end is source:
+                edge.end = target
+                _link(target, '_incoming', edge)
+            if edge.connector is source:
+                edge.connector = target
+        source._incoming = source._outgoing = ()
+
+    def merge_edges(self, count_attr=None, scale_penwidth=False):
+        '''Replace parallel edges with a single edge (see reduce.merge_edges)'''
+        from .reduce import merge_edges
+        return merge_edges(self, count_attr, scale_penwidth)
+
+    def transitive_reduction(self):
+        '''Remove edges implied by other paths (see reduce.transitive_reduction)'''
+        from .reduce import transitive_reduction
+        return transitive_reduction(self)
+
+    def collapse_components(self, label=None):
+        '''Replace cycles with single nodes (see reduce.collapse_components)'''
+        from .reduce import collapse_components
+        return collapse_components(self, label)
+
+    def view(self, nodes, **attrs):
+        '''Lightweight view of selected nodes and edges between them (see view.GraphView)'''
+        from .view import view_class
+        return view_class(self.__class__)(self, nodes, **attrs)
+
+    def filter(self, predicate, **attrs):
+        '''View of nodes for which predicate(node) is true (see view.GraphView)'''
+        from .view import view_class
+        return view_class(self.__class__).where(self, predicate, **attrs)
+
+    def around(self, nodes, hops=1, direction='both', **attrs):
+        '''View of k-hop neighbourhood of nodes (see view.GraphView.around)'''
+        from .view import view_class
+        return view_class(self.__class__).around(self, nodes, hops, direction, **attrs)
+
+    def sources(self):
+        '''List of nodes with no incoming edges'''
+        return [node for node in self.nodes if not node._incoming]
+
+    def sinks(self):
+        '''List of nodes with no outgoing edges'''
+        return [node for node in self.nodes if not node._outgoing]
+
+
+def _name_base(attrs):
+    '''Return node name before resolving collisions'''
+    name = getattr(attrs, 'name', None)
+    if name is None:
+        name = re.sub(r'\W', '', attrs.label)
+    return name
+
+
+class UniqueNames:
+    '''
+    Generate unique names by adding suffixes to duplicates
+
+    Suffix counter is remembered for each base name, so that generating N
+    unique names takes linear time even if all of them share the same base.
+    '''
+
+    def __init__(self, suffix=lambda name, count: f'{name}_{count}'):
+        self.suffix = suffix
+        self.taken = set()
+        self.counters = {}
+
+    def __call__(self, name):
+        '''Return unique name based on the provided one'''
+        if name in self.taken:
+            count = self.counters.get(name, 1)
+            candidate = self.suffix(name, count)
+            while candidate in self.taken:
+                count += 1
+                candidate = self.suffix(name, count)
+            self.counters[name] = count + 1
+            name = candidate
+        self.taken.add(name)
+        return name
+
+
+class DotSource:
+    '''
+    Dot language source generated directly from graph members
+
+    Lightweight replacement for graphviz.Digraph: output is identical, but no
+    intermediate foreign graph is built. Lines are generated on demand.
+    '''
+
+    stats = None  # RenderStats that measure serialization (see Graph.render)
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} for {self.graph}>'
+
+    def __iter__(self):
+        '''
+        Yield dot language source line by line
+
+        If graph.CACHE_DOT_FRAGMENTS is enabled, serialized lines are saved
+        between renders. Attrs values are copy-on-write tuples, so a member is
+        serialized again only if its attrs (or the names of edge endpoints)
+        have changed since the previous render. Caching starts with the second
+        render, so that graphs rendered only once do not pay for it.
+        '''
+        graph = self.graph
+        quote = lru_cache(maxsize=None)(dot_quote)
+        quote_edge = lru_cache(maxsize=None)(dot_quote_edge)
+        fragments = graph._dot_fragments
+        caching = graph.CACHE_DOT_FRAGMENTS and fragments is not None
+        if not caching:
+            fragments = {}
+        elif len(fragments) > len(graph.nodes) + len(graph.edges):  # forget removed members
+            fragments = graph._dot_fragments = {
+                member: fragments[member]
+                for member in chain(graph.nodes, graph.edges)
+                if member in fragments
+            }
+        yield 'digraph {\n'
+        attrs = vars(graph.attrs)
+        if attrs:
+            yield f'\tgraph{dot_attr_list(attrs, quote=quote)}\n'
+        names = graph._node_names()
+        overlay = graph._attr_overlay()
+        edge_ids = {}
+        for node in graph.nodes:
+            attrs = node.attrs
+            if overlay and node in overlay:
+                attrs = overlay[node]
+            name = names[node]
+            cached = fragments.get(node)
+            if cached is None \
+            or cached[0] is not attrs._values \
+            or cached[1] is not attrs._keys \
+            or cached[2] != name:
+                line = f'\t{quote(name)}{dot_attr_list(vars(attrs), "label", "name", quote)}\n'
+                cached = (attrs._values, attrs._keys, name, line, quote_edge(name))
+                if caching:
+                    fragments[node] = cached
+            edge_ids[node] = cached[4]
+            yield cached[3]
+        for edge in graph.edges:
+            attrs = edge.attrs
+            if overlay and edge in overlay:
+                attrs = overlay[edge]
+            tail = edge_ids[edge.start]
+            head = edge_ids[edge.end]
+            cached = fragments.get(edge)
+            if cached is None \
+            or cached[0] is not attrs._values \
+            or cached[1] is not attrs._keys \
+            or cached[2] != tail \
+            or cached[3] != head:
+                line = f'\t{tail} -> {head}{dot_attr_list(vars(attrs), "label", quote=quote)}\n'
+                cached = (attrs._values, attrs._keys, tail, head, line)
+                if caching:
+                    fragments[edge] = cached
+            yield cached[4]
+        yield '}\n'
+        if graph._dot_fragments is None:
+            graph._dot_fragments = {}
+
+    @property
+    def source(self):
+        '''Dot language source as a string'''
+        return ''.join(self)
+
+
+class SerializedSource(DotSource):
+    '''Dot language source that was serialized already, streamed as is'''
+
+    def __init__(self, graph, chunks):
+        super().__init__(graph)
+        self.chunks = chunks
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+
+def dot_quote(identifier):
+    '''Return dot language identifier from string, quote if needed'''
+    if HTML_STRING.match(identifier):
+        return identifier
+    if not ID.match(identifier) or identifier.lower() in KEYWORDS:
+        escaped = QUOTE_WITH_OPTIONAL_BACKSLASHES.sub(
+            r'\g<escaped_backslashes>\\\g<literal_quote>',
+            identifier,
+        )
+        return f'"{escaped}"'
+    return identifier
+
+
+def dot_quote_edge(identifier, quote=dot_quote):
+    '''Return edge statement node id (node[:port[:compass]]), quote if needed'''
+    node, _, rest = identifier.partition(':')
+    parts = [quote(node)]
+    if rest:
+        port, _, compass = rest.partition(':')
+        parts.append(quote(port))
+        if compass:
+            parts.append(compass)
+    return ':'.join(parts)
+
+
+def dot_attr_list(attrs, first=None, skip=None, quote=dot_quote):
+    '''
+    Return dot language attribute list for a dictionary of attributes
+
+    Attribute named `first` is placed at the beginning, other attributes are
+    sorted by name (same as graphviz package does). Attribute named `skip` and
+    attributes with None values are omitted.
+    '''
+    if not attrs:
+        return ''
+    parts = []
+    if first is not None:
+        value = attrs.get(first)
+        if value is not None:
+            parts.append(f'{first}={quote(value)}')
+    for key in sorted(attrs):
+        if key == first or key == skip:
+            continue
+        value = attrs[key]
+        if value is not None:
+            parts.append(f'{quote(key)}={quote(value)}')
+    if not parts:
+        return ''
+    return f' [{" ".join(parts)}]'
+
+
+# Adjacency lists longer than this are converted to MemberList when an edge
+# is removed from them, so that removals do not scan the list
+ADJACENCY_INDEX_MIN = 16
+
+
+def _attach(edge):
+    '''Add edge to adjacency lists of its endpoints'''
+    start, end = edge.start, edge.end
+    if start._outgoing:
+        start._outgoing.append(edge)
+    else:
+        start._outgoing = [edge]
+    if end._incoming:
+        end._incoming.append(edge)
+    else:
+        end._incoming = [edge]
+
+
+def _detach(edge):
+    '''Remove edge from adjacency lists of its endpoints'''
+    _unlink(edge.start, '_outgoing', edge)
+    _unlink(edge.end, '_incoming', edge)
+
+
+def _link(node, adjacency, edge):
+    '''Add edge to adjacency list of node ('_incoming' or '_outgoing')'''
+    edges = getattr(node, adjacency)
+    if edges:
+        edges.append(edge)
+    else:
+        setattr(node, adjacency, [edge])
+
+
+def _unlink(node, adjacency, edge):
+    '''Remove edge from adjacency list of node ('_incoming' or '_outgoing')'''
+    edges = getattr(node, adjacency)
+    if type(edges) is list and len(edges) > ADJACENCY_INDEX_MIN:
+        edges = MemberList(edges)
+        setattr(node, adjacency, edges)
+    edges.remove(edge)
+
+
+class MemberList(MutableSequence):
+    '''
+    Insertion ordered list of graph members with constant time removal
+
+    Behaves like a list, but also keeps the position of each member, so that
+    membership tests, index(), remove() and replace() do not scan the list.
+    Removed members leave holes which are compacted lazily: when they
+    outnumber the members or when positional access is requested. Each
+    member may be added only once: assigning a member that is already in the
+    list to another position swaps the two members (so that the usual
+    members[i], members[j] = members[j], members[i] works as expected).
+    '''
+
+    __slots__ = ('_items', '_positions')
+
+    def __init__(self, members=()):
+        self._items = []
+        self._positions = {}
+        self.extend(members)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({list(self)!r})'
+
+    def __reduce__(self):
+        return self.__class__, (list(self),)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        return (item for item in self._items if item is not _HOLE)
+
+    def __reversed__(self):
+        return (item for item in reversed(self._items) if item is not _HOLE)
+
+    def __contains__(self, member):
+        return member in self._positions
+
+    def __eq__(self, other):
+        if isinstance(other, MemberList):
+            other._compact()
+            other = other._items
+        if isinstance(other, list):
+            self._compact()
+            return self._items == other
+        return NotImplemented
+
+    def __add__(self, other):
+        result = MemberList(self)
+        result.extend(other)
+        return result
+
+    def __radd__(self, other):
+        result = MemberList(other)
+        result.extend(self)
+        return result
+
+    def __getitem__(self, index):
+        self._compact()
+        return self._items[index]
+
+    def __setitem__(self, index, value):
+        self._compact()
+        if isinstance(index, slice):
+            items = self._items[:]
+            items[index] = list(value)
+            self._rebuild(items)
+            return
+        old = self._items[index]
+        position = self._positions.get(value)
+        if position is None:
+            self.replace(old, value)
+        elif value is not old:  # swap
+            self._items[self._positions[old]] = value
+            self._items[position] = old
+            self._positions[value], self._positions[old] = self._positions[old], position
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._compact()
+            items = self._items[:]
+            del items[index]
+            self._rebuild(items)
+        else:
+            self.pop(index)
+
+    def insert(self, index, member):
+        if member in self._positions:
+            raise ValueError(f'already in {self.__class__.__name__}: {member}')
+        self._compact()
+        items = self._items
+        position = min(max(index + len(items) if index < 0 else index, 0), len(items))
+        items.insert(position, member)
+        positions = self._positions
+        for position in range(position, len(items)):
+            positions[items[position]] = position
+
+    def pop(self, index=-1):
+        '''Remove and return member at index, last one in constant time'''
+        if index == -1:  # no compaction required
+            items = self._items
+            while items and items[-1] is _HOLE:
+                items.pop()
+            if not items:
+                raise IndexError(f'pop from empty {self.__class__.__name__}')
+            member = items[-1]
+        else:
+            member = self[index]
+        self.remove(member)
+        return member
+
+    def append(self, member):
+        if member in self._positions:
+            raise ValueError(f'already in {self.__class__.__name__}: {member}')
+        self._positions[member] = len(self._items)
+        self._items.append(member)
+
+    def extend(self, members):
+        members = list(members)
+        positions = self._positions
+        expected = len(positions) + len(members)
+        start = len(self._items)
+        positions.update(zip(members, range(start, start + len(members))))
+        if len(positions) != expected:
+            self._rebuild(self._items)  # restore positions of existing members
+            raise ValueError(f'duplicate members can not be added to {self.__class__.__name__}')
+        self._items.extend(members)
+
+    def index(self, member, start=0, stop=None):
+        if member not in self._positions:
+            raise ValueError(f'not in {self.__class__.__name__}: {member}')
+        self._compact()
+        position = self._positions[member]
+        if position < start or (stop is not None and position >= stop):
+            raise ValueError(f'not in {self.__class__.__name__}: {member}')
+        return position
+
+    def count(self, member):
+        return int(member in self._positions)
+
+    def remove(self, member):
+        '''Remove member in constant time'''
+        position = self._positions.pop(member, None)
+        if position is None:
+            raise ValueError(f'not in {self.__class__.__name__}: {member}')
+        self._items[position] = _HOLE
+        if len(self._items) > 2 * len(self._positions) + 16:
+            self._compact()
+
+    def replace(self, old, new):
+        '''Put new member in place of the old one in constant time'''
+        if new is old:
+            return
+        if new in self._positions:
+            raise ValueError(f'already in {self.__class__.__name__}: {new}')
+        position = self._positions.pop(old, None)
+        if position is None:
+            raise ValueError(f'not in {self.__class__.__name__}: {old}')
+        self._items[position] = new
+        self._positions[new] = position
+
+    def clear(self):
+        self._items = []
+        self._positions = {}
+
+    def reverse(self):
+        self._compact()
+        self._items.reverse()
+        self._rebuild(self._items)
+
+    def sort(self, *, key=None, reverse=False):
+        self._compact()
+        self._items.sort(key=key, reverse=reverse)
+        self._rebuild(self._items)
+
+    def copy(self):
+        '''Return a shallow copy (plain MemberList)'''
+        return MemberList(self)
+
+    def _compact(self):
+        '''Drop holes left by removed members'''
+        if len(self._items) != len(self._positions):
+            self._rebuild([item for item in self._items if item is not _HOLE])
+
+    def _rebuild(self, items):
+        positions = dict(zip(items, range(len(items))))
+        if len(positions) != len(items):
+            raise ValueError(f'duplicate members can not be added to {self.__class__.__name__}')
+        self._items = items
+        self._positions = positions
+
+
+_HOLE = object()  # placeholder for removed members in MemberList
+
+
+class EdgeList(MemberList):
+    '''
+    Graph edges (see MemberList) that keep adjacency lists of nodes current
+
+    Edges added with any list method are attached to their endpoints (see
+    Node.incoming, Node.outgoing), removed edges are detached from them.
+    '''
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return _restore_edges, (list(self),)  # adjacency lists are saved with nodes
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, slice):
+            super().__setitem__(index, value)  # calls replace()
+            return
+        value = list(value)
+        old = self[index]
+        super().__setitem__(index, value)
+        added = set(value)
+        for edge in old:
+            if edge not in added:
+                _detach(edge)
+        old = set(old)
+        for edge in value:
+            if edge not in old:
+                _attach(edge)
+
+    def __delitem__(self, index):
+        if not isinstance(index, slice):
+            super().__delitem__(index)  # calls remove()
+            return
+        old = self[index]
+        super().__delitem__(index)
+        for edge in old:
+            _detach(edge)
+
+    def insert(self, index, edge):
+        super().insert(index, edge)
+        _attach(edge)
+
+    def append(self, edge):
+        super().append(edge)
+        _attach(edge)
+
+    def extend(self, edges):
+        edges = list(edges)
+        super().extend(edges)
+        for edge in edges:
+            _attach(edge)
+
+    def remove(self, edge):
+        super().remove(edge)
+        _detach(edge)
+
+    def replace(self, old, new):
+        if new is old:
+            return
+        super().replace(old, new)
+        _detach(old)
+        _attach(new)
+
+    def clear(self):
+        edges = list(self)
+        super().clear()
+        for edge in edges:
+            _detach(edge)
+
+
+def _restore_edges(edges):
+    '''Unpickle EdgeList without attaching edges again'''
+    restored = EdgeList()
+    restored._rebuild(edges)
+    return restored
+
+
+class KeyTable:
+    '''
+    Attribute names shared between all Attrs objects with the same set of keys
+
+    Tables are interned: there is only one table for each sequence of names.
+    Adding a name to a table returns another (cached) table.
+    '''
+
+    __slots__ = ('names', 'index', 'children')
+    _registry = {}
+
+    def __init__(self, names):
+        self.names = names
+        self.index = {name: position for position, name in enumerate(names)}
+        self.children = {}
+
+    @classmethod
+    def get(cls, names):
+        '''Return shared key table for a tuple of names'''
+        table = cls._registry.get(names)
+        if table is None:
+            table = cls._registry[names] = cls(names)
+        return table
+
+    def add(self, name):
+        '''Return key table with one more name'''
+        table = self.children.get(name)
+        if table is None:
+            table = self.children[name] = self.get(self.names + (sys.intern(name),))
+        return table
+
+    def remove(self, name):
+        '''Return key table without the given name'''
+        return self.get(tuple(n for n in self.names if n != name))
+
+
+class Attrs:
+    '''
+    Compact storage for graph member attributes
+
+    Drop-in replacement for argparse.Namespace: attributes are accessed as
+    object attributes and vars() returns a dictionary (a copy, changes to that
+    dictionary are not propagated back). Attribute names are stored in key
+    tables shared between objects, values are stored in a tuple.
+    '''
+
+    __slots__ = ('_keys', '_values')
+
+    def __init__(self, **attrs):
+        object.__setattr__(self, '_keys', KeyTable.get(tuple(attrs)))
+        object.__setattr__(self, '_values', tuple(attrs.values()))
+
+    @classmethod
+    def from_table(cls, keys, values):
+        '''Create Attrs object from a KeyTable and a tuple of values'''
+        attrs = cls.__new__(cls)
+        object.__setattr__(attrs, '_keys', keys)
+        object.__setattr__(attrs, '_values', values)
+        return attrs
+
+    def __getattr__(self, name):
+        if name in Attrs.__slots__:  # not initialized yet
+            raise AttributeError(name)
+        position = self._keys.index.get(name)
+        if position is None:
+            raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+        return self._values[position]
+
+    def __setattr__(self, name, value):
+        values = self._values
+        position = self._keys.index.get(name)
+        if position is None:
+            object.__setattr__(self, '_keys', self._keys.add(name))
+            values = values + (value,)
+        else:
+            values = values[:position] + (value,) + values[position+1:]
+        object.__setattr__(self, '_values', values)
+
+    def __delattr__(self, name):
+        values = self._values
+        position = self._keys.index.get(name)
+        if position is None:
+            raise AttributeError(name)
+        object.__setattr__(self, '_keys', self._keys.remove(name))
+        object.__setattr__(self, '_values', values[:position] + values[position+1:])
+
+    @property
+    def __dict__(self):
+        return dict(zip(self._keys.names, self._values))
+
+    def __contains__(self, name):
+        return name in self._keys.index
+
+    def __eq__(self, other):
+        if not isinstance(other, Attrs):
+            return NotImplemented
+        return vars(self) == vars(other)
+
+    def __repr__(self):
+        args = ', '.join(f'{key}={value!r}' for key, value in zip(self._keys.names, self._values))
+        return f'{self.__class__.__name__}({args})'
+
+    def __reduce__(self):
+        return (self.__class__, (), vars(self))
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def update_attrs(attrs, changes):
+    '''
+    Set several attributes of Attrs object at once
+
+    Values tuple is rebuilt only once. Attributes set to None are removed.
+    '''
+    merged = vars(attrs)
+    merged.update(changes)
+    merged = {key: value for key, value in merged.items() if value is not None}
+    object.__setattr__(attrs, '_keys', KeyTable.get(tuple(merged)))
+    object.__setattr__(attrs, '_values', tuple(merged.values()))
+
+
+class AttrsFactory:
+    '''
+    Create Attrs objects for many members that share default attributes
+
+    Defaults are converted to strings only once. Key tables are computed once
+    for each set of extra attribute names. Members without any extra
+    attributes share the same (immutable) tuple of values.
+    '''
+
+    def __init__(self, defaults):
+        defaults = vars(parse_attrs(defaults))
+        self.keys = KeyTable.get(tuple(defaults))
+        self.values = tuple(defaults.values())
+        self.layouts = {}
+
+    def __call__(self, extra=None):
+        '''Return new Attrs object: defaults updated with extra attributes'''
+        if not extra:
+            return Attrs.from_table(self.keys, self.values)
+        names = tuple(extra)
+        layout = self.layouts.get(names)
+        if layout is None:
+            layout = self.layouts[names] = self._layout(names)
+        keys, values, positions = layout
+        values = list(values)
+        for position, value in zip(positions, extra.values()):
+            values[position] = value if type(value) is str else sys.intern(str(value))
+        return Attrs.from_table(keys, tuple(values))
+
+    def _layout(self, names):
+        '''Calculate key table and value positions for extra attribute names'''
+        keys = self.keys
+        for name in names:
+            name = str(name)
+            if name not in keys.index:
+                keys = keys.add(name)
+        values = self.values + (None,) * (len(keys.names) - len(self.values))
+        positions = [keys.index[str(name)] for name in names]
+        return keys, values, positions
+
+
+def iter_rows(data):
+    '''
+    Iterate over rows of tabular data
+
+    Data may be an iterable of rows or a dictionary of equally sized columns,
+    in the latter case rows are yielded as dictionaries.
+    '''
+    if not isinstance(data, dict):
+        return iter(data)
+    if len({len(column) for column in data.values()}) > 1:
+        raise ValueError('all columns must have the same length')
+    names = list(data)
+    return (dict(zip(names, values)) for values in zip(*data.values()))
+
 
 def parse_attrs(dictionary):
     '''
     Convert keys and values of a given dictionary to strings
-    Wrap resulting dictionary into a Namespace object
+    Wrap resulting dictionary into an Attrs object
+
+    Values that were not strings initially (numbers, etc) are interned to
+    avoid storing thousands of copies of the same string.
     '''
-    return Namespace(**{str(k): str(v) for k, v in dictionary.items()})
+    return Attrs(**{
+        str(k): v if type(v) is str else sys.intern(str(v))
+        for k, v in dictionary.items()
+    })
@@ -0,0 +1,142 @@
+'''
+Timing and size metrics collected while rendering graphs
+'''
+
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from .logging import log
+
+
+_render_hooks = []
+
+# Dot source lines are timed and counted in batches: per line clock calls
+# would cost as much as generating the lines
+MEASURE_BATCH = 1024
+
+
+def add_render_hook(callback):
+    '''
+    Call callback(graph, stats) after each Graph.render(), including failed ones
+
+    Exceptions raised by callbacks are logged and do not affect rendering.
+    '''
+    _render_hooks.append(callback)
+    return callback
+
+
+def remove_render_hook(callback):
+    '''Stop calling callback registered with add_render_hook()'''
+    _render_hooks.remove(callback)
+
+
+class RenderStats:
+    '''
+    Metrics of a single Graph.render() call
+
+    nodes, edges -- graph size
+    fmt, filename -- output format and file (None when rendering to string)
+    engine -- Graphviz engine that produced the output (None if not executed)
+    phases -- seconds spent in each phase, in order of execution:
+        styles    -- applying pending style rules
+        translate -- building foreign graph (_make_foreign_graph)
+        serialize -- generating dot language source
+        cache     -- looking up cached output
+        layout    -- running Graphviz
+        write     -- writing output file (dot format and cached results)
+    dot_bytes -- size of dot language source (UTF-8)
+    output_bytes -- size of output file (or string)
+    cached -- True if output was taken from cache (None if cache was not used)
+    seconds -- total time
+    error -- exception raised by render(), if any
+
+    Dot source is streamed into Graphviz process, so serialize time is
+    measured inside the stream and excluded from layout time. For foreign
+    graph backends (graph_cls) layout includes serialization done by that
+    backend.
+    '''
+
+    def __init__(self, graph, fmt=None, filename=None):
+        self.nodes = len(graph.nodes)
+        self.edges = len(graph.edges)
+        self.fmt = fmt
+        self.filename = filename
+        self.engine = None
+        self.phases = {}
+        self.dot_bytes = 0
+        self.output_bytes = None
+        self.cached = None
+        self.seconds = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def __repr__(self):
+        phases = ', '.join(f'{name}={seconds:.3f}s' for name, seconds in self.phases.items())
+        return f'<{self.__class__.__name__} {self.nodes} nodes, {self.edges} edges, {self.dot_bytes} dot bytes: {phases}>'
+
+    def as_dict(self):
+        '''Return metrics as a flat dictionary of plain values'''
+        metrics = dict(
+            nodes=self.nodes,
+            edges=self.edges,
+            fmt=self.fmt,
+            filename=None if self.filename is None else str(self.filename),
+            engine=self.engine,
+            dot_bytes=self.dot_bytes,
+            output_bytes=self.output_bytes,
+            cached=self.cached,
+            seconds=self.seconds,
+            error=None if self.error is None else repr(self.error),
+        )
+        for name, seconds in self.phases.items():
+            metrics[f'{name}_seconds'] = seconds
+        return metrics
+
+    @contextmanager
+    def phase(self, name):
+        '''Measure time spent in a phase (serialization within it is not counted)'''
+        serialized = self.phases.get('serialize', 0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            elapsed -= self.phases.get('serialize', 0) - serialized
+            self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def measure(self, lines):
+        '''
+        Yield dot source in chunks of MEASURE_BATCH lines
+
+        Size of the source and time spent generating it are counted.
+        '''
+        clock = time.perf_counter
+        phases = self.phases
+        phases.setdefault('serialize', 0)
+        lines = iter(lines)
+        while True:
+            started = clock()
+            batch = list(islice(lines, MEASURE_BATCH))
+            chunk = ''.join(batch)
+            phases['serialize'] += clock() - started
+            if not batch:
+                return
+            self.dot_bytes += len(chunk) if chunk.isascii() else len(chunk.encode('utf-8'))
+            yield chunk
+
+    def finish(self, graph):
+        '''Save total time, report metrics to logger and render hooks'''
+        self.seconds = time.perf_counter() - self._started
+        log.info(
+            'Rendered %s in %.3fs: %s',
+            graph,
+            self.seconds,
+            ', '.join(f'{name} {seconds:.3f}s' for name, seconds in self.phases.items()),
+            extra=dict(render_stats=self.as_dict()),
+        )
+        for callback in list(_render_hooks):
+            try:
+                callback(graph, self)
+            except Exception:
+                log.exception('Render hook %r failed', callback)
@@ -0,0 +1,410 @@
+'''
+Streaming parser for dot language digraphs
+
+Input is read in chunks and members are added to graph in batches with bulk
+API (Graph.add_nodes, Graph.add_edges), so memory used by the parser itself
+does not depend on input size.
+
+Dot language features that have no counterpart in managed graphs are
+flattened: members of subgraphs and clusters are added to the graph itself
+(subgraph attributes are ignored, node and edge defaults are scoped as usual),
+node and edge defaults are copied to each affected member and edge ports are
+saved as tailport/headport attributes.
+'''
+
+import codecs
+import re
+from os import PathLike
+
+from .members import update_attrs
+
+
+CHUNK_SIZE = 1 << 20  # characters read from input at once
+BATCH_SIZE = 10000  # members added to graph at once
+ATTR_LISTS_CACHED = 1000
+
+TOKEN = re.compile(r'''
+    (?:\s+|//[^\n]*|/\*.*?\*/|^\#[^\n]*)+   # whitespace and comments
+    |(?P<id>(?:[^\W\d]|[^\x00-\x7f])(?:\w|[^\x00-\x7f])*|-?(?:\.\d+|\d+(?:\.\d*)?))
+    |"(?P<string>(?:[^"\\]|\\.)*)"
+    |(?P<op>->|--|[{}\[\];,=:+<])
+    ''', re.VERBOSE | re.DOTALL | re.MULTILINE)
+# Simple node and edge statements (the bulk of machine generated files) are
+# matched as a whole instead of token by token
+_ID = r'''(?:(?:(?!\d)[\w\x80-\U0010ffff]+|-?(?:\.\d+|\d+(?:\.\d*)?))(?![\w.\x80-\U0010ffff])
+            |"[^"\\]*(?:\\.[^"\\]*)*")'''
+STATEMENT = re.compile(rf'''
+    \s*(?P<tail>{_ID})
+    (?:\s*->\s*(?P<head>{_ID}))?
+    \s*(?:\[(?P<attrs>(?:\s*{_ID}\s*=\s*{_ID}\s*[,;]?)*)\s*\])?
+    \s*;?\s*
+    (?=[^-\[:=+/\#\s]|\Z)  # statement is not continued (comments are left to slow path)
+    ''', re.VERBOSE)
+ATTR = re.compile(rf'''({_ID})\s*=\s*({_ID})''', re.VERBOSE)
+STATEMENT_BOUNDARY = {'{', '}', ';', ']'}
+HTML = re.compile(r'[<>]')
+ESCAPED = re.compile(r'\\(["\n])')
+KEYWORDS = {'node', 'edge', 'graph', 'digraph', 'subgraph', 'strict'}
+
+
+class DotSyntaxError(ValueError):
+    '''Input is not a valid dot language digraph'''
+
+
+def parse(graph, source, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE):
+    '''
+    Add members described by dot language source to graph
+
+    Source may be a path or a file object (text or binary, binary input is
+    decoded as UTF-8). Only the first graph in source is parsed.
+    '''
+    if isinstance(source, (str, PathLike)):
+        with open(source, encoding='utf-8') as stream:
+            return parse(graph, stream, chunk_size, batch_size)
+    DotParser(graph, batch_size).parse(tokenize(source, chunk_size))
+    return graph
+
+
+def tokenize(stream, chunk_size=CHUNK_SIZE):
+    '''
+    Yield (kind, value) tuples for dot language tokens read from stream
+
+    Kinds are: 'id' (unquoted identifiers and numerals, keywords are
+    lowercased), 'string' (quoted strings with escaped quotes and line
+    continuations resolved, or HTML strings with angle brackets) and 'op'.
+    Simple node and edge statements are yielded as a whole: ('statement',
+    (tail, head or None, attrs dictionary or None)).
+    '''
+    decoder = None
+    buffer = ''
+    position = 0
+    line = 1
+    eof = False
+    match = TOKEN.match
+    match_statement = STATEMENT.match
+    boundary = True  # a statement may start at current position
+    attr_lists = {}  # repeated attribute lists are parsed once (values are shared)
+    while True:
+        if not eof:  # all complete tokens from the buffer were consumed
+            chunk = stream.read(chunk_size)
+            eof = not chunk  # decided by raw input: a partial character decodes to ''
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                chunk = decoder.decode(chunk, final=eof)
+            if chunk:
+                line += buffer.count('\n', 0, position)
+                buffer = buffer[position:] + chunk
+                position = 0
+        end = len(buffer)
+        while position < end:
+            if boundary:
+                statement = match_statement(buffer, position)
+                if statement is not None:
+                    if statement.end() == end and not eof:
+                        break
+                    tail, head, attrs = statement.groups()
+                    if tail.lower() not in KEYWORDS and (head is None or head.lower() not in KEYWORDS):
+                        position = statement.end()
+                        if attrs:
+                            parsed = attr_lists.get(attrs)
+                            if parsed is None:
+                                if len(attr_lists) > ATTR_LISTS_CACHED:
+                                    attr_lists.clear()
+                                parsed = attr_lists[attrs] = {
+                                    _unquote(name): _unquote(value)
+                                    for name, value in ATTR.findall(attrs)
+                                }
+                            attrs = parsed
+                        yield 'statement', (_unquote(tail), head and _unquote(head), attrs)
+                        continue
+            token = match(buffer, position)
+            if token is None or (token.end() == end and not eof):
+                break  # token may continue in the next chunk
+            position = token.end()
+            kind = token.lastgroup
+            if kind is None:
+                continue
+            value = token.group(kind)
+            boundary = kind == 'op' and value in STATEMENT_BOUNDARY
+            if kind == 'id':
+                lowered = value.lower()
+                if lowered in KEYWORDS:
+                    value = lowered
+            elif kind == 'string':
+                value = _unescape(value)
+            elif value == '<':
+                html = _html_end(buffer, position - 1)
+                if html is None:
+                    if eof:
+                        raise _error('unterminated HTML string', buffer, position - 1, line)
+                    position -= 1
+                    break
+                kind = 'string'
+                value = buffer[position - 1:html]
+                position = html
+            yield kind, value
+        else:
+            if eof:
+                return
+            continue
+        if eof:
+            raise _error('unexpected input', buffer, position, line)
+
+
+def _unescape(value):
+    '''Resolve escaped quotes and line continuations in quoted string'''
+    if '\\' in value:
+        return ESCAPED.sub(lambda escaped: '"' if escaped.group(1) == '"' else '', value)
+    return value
+
+
+def _unquote(value):
+    '''Return ID value matched by STATEMENT (quoted or not)'''
+    if value[0] == '"':
+        return _unescape(value[1:-1])
+    return value
+
+
+def _html_end(text, start):
+    '''Return position after HTML string that starts at given position (or None)'''
+    depth = 0
+    for bracket in HTML.finditer(text, start):
+        depth += 1 if bracket.group() == '<' else -1
+        if depth == 0:
+            return bracket.end()
+    return None
+
+
+def _error(message, buffer, position, line):
+    line += buffer.count('\n', 0, position)
+    return DotSyntaxError(f'{message} on line {line}: {buffer[position:position + 20]!r}')
+
+
+class DotParser:
+    '''
+    Recursive descent parser that adds dot language members to graph
+
+    Nodes and edges are collected into batches and added with bulk API.
+    Attribute statements for nodes that were already added update their
+    attributes in place.
+    '''
+
+    def __init__(self, graph, batch_size=BATCH_SIZE):
+        self.graph = graph
+        self.batch_size = batch_size
+        self.nodes = {}  # name -> Node, or attributes dictionary if not added yet
+        self.pending_nodes = []
+        self.pending_edges = []
+        self.strict_edges = None  # (tail, head) -> Edge or attributes dictionary
+        self.scopes = []  # names of nodes mentioned in each open subgraph
+        self.tokens = None
+        self.token = None
+
+    def parse(self, tokens):
+        '''Parse the first graph from tokens'''
+        self.tokens = iter(tokens)
+        self.advance()
+        if self.token == ('id', 'strict'):
+            self.strict_edges = {}
+            self.advance()
+        if self.token == ('id', 'graph'):
+            raise DotSyntaxError('undirected graphs are not supported')
+        self.expect('id', 'digraph')
+        if self.token[0] != 'op':
+            self.advance()  # graph name is not saved
+        self.expect('op', '{')
+        self.statements({}, {}, top=True)
+        self.expect('op', '}')
+        self.flush()
+
+    def advance(self):
+        self.token = next(self.tokens, (None, None))
+
+    def expect(self, kind, value=None):
+        token_kind, token_value = self.token
+        if token_kind != kind or (value is not None and token_value != value):
+            raise DotSyntaxError(f'expected {value or kind}, got {token_value!r}')
+        self.advance()
+        return token_value
+
+    def identifier(self):
+        '''Return ID, concatenating quoted strings joined with +'''
+        kind, value = self.token
+        if kind == 'string':
+            self.advance()
+            while self.token == ('op', '+'):
+                self.advance()
+                value += self.expect('string')
+            return value
+        if kind == 'id' and value not in KEYWORDS:
+            self.advance()
+            return value
+        raise DotSyntaxError(f'expected identifier, got {value!r}')
+
+    def attr_list(self):
+        '''Parse zero or more [a=b, c=d; ...] lists into a dictionary'''
+        attrs = {}
+        while self.token == ('op', '['):
+            self.advance()
+            while self.token != ('op', ']'):
+                name = self.identifier()
+                self.expect('op', '=')
+                attrs[name] = self.identifier()
+                if self.token in {('op', ','), ('op', ';')}:
+                    self.advance()
+            self.advance()
+        return attrs
+
+    def statements(self, node_defaults, edge_defaults, top=False):
+        '''Parse statements until closing brace'''
+        while self.token != ('op', '}'):
+            kind, value = self.token
+            if kind is None:
+                raise DotSyntaxError('unexpected end of input, expected }')
+            if kind == 'statement':
+                tail, head, attrs = value
+                self.advance()
+                if head is None:
+                    self.node(tail, node_defaults, attrs)
+                else:
+                    self.node(tail, node_defaults)
+                    self.node(head, node_defaults)
+                    edge_attrs = edge_defaults.copy()
+                    if attrs:
+                        edge_attrs.update(attrs)
+                    self.edge(tail, head, edge_attrs)
+                continue
+            if kind == 'id' and value in {'graph', 'node', 'edge'}:
+                self.advance()
+                attrs = self.attr_list()
+                if value == 'node':
+                    node_defaults.update(attrs)
+                elif value == 'edge':
+                    edge_defaults.update(attrs)
+                elif top:
+                    self.graph_attrs(attrs)
+            elif self.token == ('op', '{') or value == 'subgraph':
+                operand = self.subgraph(node_defaults, edge_defaults)
+                if self.token == ('op', '->'):
+                    self.edges(operand, node_defaults, edge_defaults)
+            else:
+                name = self.identifier()
+                if self.token == ('op', '='):
+                    self.advance()
+                    value = self.identifier()
+                    if top:
+                        self.graph_attrs({name: value})
+                else:
+                    port = self.port()
+                    if self.token == ('op', '->'):
+                        self.node(name, node_defaults)
+                        self.edges([(name, port)], node_defaults, edge_defaults)
+                    else:
+                        self.node(name, node_defaults, self.attr_list())
+            if self.token == ('op', ';'):
+                self.advance()
+
+    def subgraph(self, node_defaults, edge_defaults):
+        '''Parse subgraph, return the list of (name, port) of its nodes'''
+        if self.token == ('id', 'subgraph'):
+            self.advance()
+            if self.token != ('op', '{'):
+                self.identifier()  # subgraph name is not saved
+        self.expect('op', '{')
+        self.scopes.append({})
+        self.statements(node_defaults.copy(), edge_defaults.copy())
+        self.expect('op', '}')
+        names = self.scopes.pop()
+        if self.scopes:
+            self.scopes[-1].update(names)
+        return [(name, None) for name in names]
+
+    def port(self):
+        '''Parse optional :port[:compass] suffix'''
+        if self.token != ('op', ':'):
+            return None
+        self.advance()
+        port = self.identifier()
+        if self.token == ('op', ':'):
+            self.advance()
+            port = f'{port}:{self.identifier()}'
+        return port
+
+    def edges(self, tails, node_defaults, edge_defaults):
+        '''Parse the rest of edge statement (starting with edge operator)'''
+        operands = [tails]
+        while self.token == ('op', '->'):
+            self.advance()
+            if self.token == ('op', '{') or self.token == ('id', 'subgraph'):
+                operands.append(self.subgraph(node_defaults, edge_defaults))
+            else:
+                name = self.identifier()
+                operands.append([(name, self.port())])
+                self.node(name, node_defaults)
+        attrs = edge_defaults.copy()
+        attrs.update(self.attr_list())
+        for tails, heads in zip(operands, operands[1:]):
+            for tail, tailport in tails:
+                for head, headport in heads:
+                    edge_attrs = attrs.copy()
+                    if tailport is not None:
+                        edge_attrs['tailport'] = tailport
+                    if headport is not None:
+                        edge_attrs['headport'] = headport
+                    self.edge(tail, head, edge_attrs)
+
+    def node(self, name, defaults, attrs=None):
+        '''Add node or update its attributes'''
+        if self.scopes:
+            self.scopes[-1][name] = None
+        node = self.nodes.get(name)
+        if node is None:
+            row = dict(defaults, name=name)
+            if attrs:
+                row.update(attrs)
+            self.nodes[name] = row
+            self.pending_nodes.append(row)
+            self.maybe_flush()
+        elif attrs:
+            if isinstance(node, dict):
+                node.update(attrs)
+            else:
+                update_attrs(node.attrs, attrs)
+
+    def edge(self, tail, head, attrs):
+        '''Add edge (or update attributes of the existing one in strict graphs)'''
+        if self.strict_edges is not None:
+            existing = self.strict_edges.get((tail, head))
+            if existing is not None:
+                if isinstance(existing, dict):
+                    existing.update(attrs)
+                else:
+                    update_attrs(existing.attrs, attrs)
+                return
+            self.strict_edges[tail, head] = attrs
+        self.pending_edges.append((tail, head, attrs))
+        self.maybe_flush()
+
+    def graph_attrs(self, attrs):
+        for name, value in attrs.items():
+            setattr(self.graph.attrs, name, value)
+
+    def maybe_flush(self):
+        if len(self.pending_nodes) + len(self.pending_edges) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        '''Add pending members to graph'''
+        nodes = self.nodes
+        if self.pending_nodes:
+            added = self.graph.add_nodes(self.pending_nodes)
+            for row, node in zip(self.pending_nodes, added):
+                nodes[row['name']] = node
+            self.pending_nodes = []
+        if self.pending_edges:
+            added = self.graph.add_edges(self.pending_edges, nodes=nodes)
+            if self.strict_edges is not None:
+                for (tail, head, _), edge in zip(self.pending_edges, added):
+                    self.strict_edges[tail, head] = edge
+            self.pending_edges = []
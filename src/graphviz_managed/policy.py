@@ -0,0 +1,121 @@
+'''
+Choose layout engine and time budget for rendering depending on graph size
+'''
+
+import time
+
+from . import engine
+from .logging import log
+
+
+# Default engine selection: (max_nodes, max_edges, engine), None means no limit
+ENGINES = (
+    (2000, 5000, 'dot'),
+    (None, None, 'sfdp'),
+)
+
+
+class RenderPolicy:
+    '''
+    Rules for rendering graphs of any size within a time budget
+
+    engines -- sequence of (max_nodes, max_edges, engine) tuples, the first
+               one that fits the graph is used (None means no limit)
+    timeout -- Graphviz process is killed if layout takes longer (seconds)
+    fallback -- what to try next if timeout is exceeded, in order: engine
+               names or callables that return a smaller copy of the graph
+               (e.g. reduce.coarsen), which is rendered with the engine
+               selected by its size
+
+    Each attempt gets its own timeout. TimeoutError from the last attempt is
+    raised if all attempts exceed the budget. Graph.render() saves the report
+    of attempts to graph.last_render_report.
+    '''
+
+    def __init__(self, engines=ENGINES, timeout=None, fallback=()):
+        self.engines = tuple(engines)
+        self.timeout = timeout
+        self.fallback = tuple(fallback)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} engines={self.engines}, timeout={self.timeout}, fallback={self.fallback}>'
+
+    def choose(self, graph):
+        '''Return engine name for rendering a given graph'''
+        nodes, edges = len(graph.nodes), len(graph.edges)
+        for max_nodes, max_edges, name in self.engines:
+            if (max_nodes is None or nodes <= max_nodes) \
+            and (max_edges is None or edges <= max_edges):
+                return name
+        return engine.DEFAULT_ENGINE
+
+    def render(self, graph, lines, filename, fmt):
+        '''Render dot source lines of graph to a file, return RenderReport'''
+        report = graph.last_render_report = RenderReport()
+        attempts = [(graph, lines, self.choose(graph))]
+        attempts.extend((graph, None, step) for step in self.fallback)
+        for source, lines, step in attempts:
+            coarsened = callable(step)
+            if coarsened:
+                source = step(graph)
+                name = self.choose(source)
+            else:
+                name = step
+            if lines is None:
+                lines = source.iter_dot()
+            log.info('Rendering %s with %s (timeout: %s)', source, name, self.timeout)
+            started = time.perf_counter()
+            try:
+                engine.pipe(lines, fmt, output=filename, engine=name, timeout=self.timeout)
+            except TimeoutError as error:
+                report.attempts.append(RenderAttempt(name, coarsened, time.perf_counter() - started, error))
+                log.warning('%s exceeded render budget: %s', source, error)
+                if len(report.attempts) == len(attempts):
+                    raise
+                continue
+            report.attempts.append(RenderAttempt(name, coarsened, time.perf_counter() - started))
+            return report
+
+
+class RenderAttempt:
+    '''Single run of Graphviz engine made by RenderPolicy'''
+
+    def __init__(self, engine, coarsened, seconds, error=None):
+        self.engine = engine
+        self.coarsened = coarsened
+        self.seconds = seconds
+        self.error = error
+
+    def __repr__(self):
+        outcome = 'ok' if self.error is None else 'timeout'
+        graph = 'coarsened graph' if self.coarsened else 'graph'
+        return f'<{self.__class__.__name__} {self.engine} on {graph}: {outcome} in {self.seconds:.3f}s>'
+
+
+class RenderReport:
+    '''Path taken by RenderPolicy: all attempts in order, the last one succeeded if ok'''
+
+    def __init__(self):
+        self.attempts = []
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.attempts}>'
+
+    @property
+    def ok(self):
+        return bool(self.attempts) and self.attempts[-1].error is None
+
+    @property
+    def engine(self):
+        '''Engine that produced the output (None if all attempts failed)'''
+        return self.attempts[-1].engine if self.ok else None
+
+    @property
+    def coarsened(self):
+        '''True if output was rendered from a coarsened copy of the graph'''
+        return self.ok and self.attempts[-1].coarsened
+
+    @property
+    def fallback(self):
+        '''True if output was not produced by the first attempt'''
+        return len(self.attempts) > 1
@@ -0,0 +1,270 @@
+'''
+Graph reduction passes: fewer members to lay out means faster rendering
+
+All passes are iterative (no recursion limit on deep graphs) and modify the
+graph in place, keeping the original order of remaining members.
+'''
+
+import copy
+
+from .members import Attrs, EdgeList, _attach, update_attrs
+from .style import RuleSheet
+
+
+def merge_edges(graph, count_attr=None, scale_penwidth=False):
+    '''
+    Replace parallel edges (same start and end) with a single edge
+
+    The first edge of each group is kept along with its attributes. If
+    count_attr is provided, the number of merged edges is saved to that
+    attribute (e.g. 'label'). If scale_penwidth is True, penwidth of the kept
+    edge is multiplied by the number of merged edges.
+
+    Returns the number of removed edges.
+    '''
+    groups = {}
+    for edge in graph.edges:
+        key = (edge.start, edge.end)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [edge]
+        else:
+            group.append(edge)
+    removed = set()
+    for kept, *duplicates in groups.values():
+        if not duplicates:
+            continue
+        removed.update(duplicates)
+        count = len(duplicates) + 1
+        changes = {}
+        if count_attr is not None:
+            changes[count_attr] = str(count)
+        if scale_penwidth:
+            penwidth = float(getattr(kept.attrs, 'penwidth', 1))
+            changes['penwidth'] = f'{penwidth * count:g}'
+        if changes:
+            update_attrs(kept.attrs, changes)
+    if removed:
+        _replace_members(graph, graph.nodes, [edge for edge in graph.edges if edge not in removed])
+    return len(removed)
+
+
+def transitive_reduction(graph):
+    '''
+    Remove edges implied by other paths (a -> c when a -> b -> c exists)
+
+    Parallel edges are removed too. Graph must be acyclic, ValueError is
+    raised otherwise. Reachability is tracked with integer bitsets, so time
+    is O(E * N / 64) in the worst case and close to linear for sparse
+    reachability. Bitset of a node is dropped as soon as all its predecessors
+    are processed: memory is proportional to the number of bitsets alive at
+    once (the width of the graph) times N / 8 bytes, not to N squared.
+
+    Returns the number of removed edges.
+    '''
+    position = {node: index for index, node in enumerate(graph.nodes)}
+    reach = {}
+    waiting = {}  # number of incoming edges not processed yet
+    removed = set()
+    for component in strongly_connected_components(graph.nodes):  # sinks first
+        if len(component) > 1:
+            raise ValueError(f'transitive reduction requires acyclic graph, found a cycle through {component[0]}')
+        node = component[0]
+        covered = 0
+        for edge in node._outgoing:
+            if edge.end is node:
+                raise ValueError(f'transitive reduction requires acyclic graph, found a loop at {node}')
+            covered |= reach[edge.end]
+        direct = 0
+        for edge in node._outgoing:
+            end = edge.end
+            bit = 1 << position[end]
+            if covered & bit or direct & bit:
+                removed.add(edge)
+            else:
+                direct |= bit
+            waiting[end] -= 1
+            if not waiting[end]:
+                del reach[end], waiting[end]
+        if node._incoming:
+            reach[node] = covered | direct
+            waiting[node] = len(node._incoming)
+    if removed:
+        _replace_members(graph, graph.nodes, [edge for edge in graph.edges if edge not in removed])
+    return len(removed)
+
+
+def collapse_components(graph, label=None):
+    '''
+    Replace each strongly connected component (cycle) with a single node
+
+    The first node of a component (in graph order) represents the whole
+    component and keeps its attributes. If label callable is provided, it
+    receives the list of component nodes and returns a new label for the
+    representative. Edges within a component are removed, other edges are
+    reattached to representatives (use merge_edges() to drop the resulting
+    parallel edges).
+
+    Returns a dictionary of representatives and lists of collapsed nodes.
+    '''
+    position = {node: index for index, node in enumerate(graph.nodes)}
+    representative = {}
+    collapsed = {}
+    for component in strongly_connected_components(graph.nodes):
+        if len(component) == 1:
+            continue
+        component.sort(key=position.__getitem__)
+        head = component[0]
+        collapsed[head] = component
+        for node in component:
+            representative[node] = head
+        if label is not None:
+            update_attrs(head.attrs, {'label': label(component)})
+    if not collapsed:
+        return collapsed
+    edges = []
+    for edge in graph.edges:
+        start = representative.get(edge.start, edge.start)
+        end = representative.get(edge.end, edge.end)
+        if start is end and edge.start is not edge.end:
+            continue  # edge within component
+        edge.connector = start if edge.connector is edge.start else end
+        edge.start = start
+        edge.end = end
+        edges.append(edge)
+    nodes = [node for node in graph.nodes if representative.get(node, node) is node]
+    for node, head in representative.items():
+        if node is not head:
+            node._incoming = node._outgoing = ()
+    _replace_members(graph, nodes, edges)
+    return collapsed
+
+
+def coarsen(graph):
+    '''
+    Return a smaller copy of graph for quick overview renders
+
+    Cycles are collapsed (representatives are labeled with the number of
+    collapsed nodes), loops are dropped, parallel edges are merged with
+    penwidth reflecting their number and implied edges are removed. Original
+    graph is not modified. Suitable as RenderPolicy fallback.
+    '''
+    coarse = copy_graph(graph)
+    collapse_components(coarse, label=_component_label)
+    _replace_members(coarse, coarse.nodes, [edge for edge in coarse.edges if edge.start is not edge.end])
+    merge_edges(coarse, scale_penwidth=True)
+    transitive_reduction(coarse)
+    return coarse
+
+
+def _component_label(nodes):
+    '''Label of collapsed component: label (or name) of its first node and the number of others'''
+    attrs = nodes[0].attrs
+    text = getattr(attrs, 'label', None)
+    if text is None:
+        text = getattr(attrs, 'name', '')
+    return f'{text} (+{len(nodes) - 1})'
+
+
+def copy_graph(graph):
+    '''
+    Return a copy of graph with copies of all members
+
+    Unlike copy.deepcopy() this does not recurse along edges, so any graph
+    can be copied. Attribute values are shared (they are immutable).
+    Attribute overlays of a view are applied to the copied members.
+    '''
+    overlay = graph._attr_overlay() or {}
+    duplicate = copy.copy(graph)
+    duplicate.attrs = Attrs.from_table(graph.attrs._keys, graph.attrs._values)
+    duplicate._dot_fragments = None  # render caches belong to the original
+    duplicate._names_cache = None
+    duplicate.nodes = []
+    duplicate._edges = EdgeList()  # not with setter: edges of the original would be detached
+    duplicate._styles = RuleSheet().extend(graph._styles)
+    duplicate.last_render_report = None
+    duplicate.last_render_stats = None
+    if overlay:
+        duplicate._overlays = {}  # already applied
+    copies = {}
+    for node in graph.nodes:
+        clone = copies[node] = copy.copy(node)
+        clone.graph = duplicate
+        attrs = overlay.get(node, node.attrs)
+        clone.attrs = Attrs.from_table(attrs._keys, attrs._values)
+    edges = []
+    for edge in graph.edges:
+        clone = copy.copy(edge)
+        clone.start = copies[edge.start]
+        clone.end = copies[edge.end]
+        clone.connector = copies.get(edge.connector, clone.end)
+        attrs = overlay.get(edge, edge.attrs)
+        clone.attrs = Attrs.from_table(attrs._keys, attrs._values)
+        edges.append(clone)
+    if graph._deferred:
+        duplicate._deferred = {
+            hook: [copies[member] for member in members if member in copies]
+            for hook, members in graph._deferred.items()
+        }
+    _replace_members(duplicate, list(copies.values()), edges)
+    return duplicate
+
+
+def strongly_connected_components(nodes):
+    '''
+    Return strongly connected components as lists of nodes
+
+    Components are listed in reverse topological order (a component is listed
+    after all components reachable from it). Iterative Tarjan's algorithm.
+    '''
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    components = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(root._outgoing))]
+        while work:
+            node, edges = work[-1]
+            for edge in edges:
+                child = edge.end
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(child._outgoing)))
+                    break
+                if child in on_stack and index[child] < lowlink[node]:
+                    lowlink[node] = index[child]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member is node:
+                            break
+                    components.append(component)
+    return components
+
+
+def _replace_members(graph, nodes, edges):
+    '''Replace graph members and rebuild adjacency lists'''
+    edges = list(edges)
+    graph.nodes[:] = nodes
+    graph.edges._rebuild(edges[:])  # edges may have been modified, adjacency is rebuilt below
+    for node in nodes:
+        node._incoming = node._outgoing = ()
+    for edge in edges:
+        _attach(edge)
@@ -0,0 +1,318 @@
+'''
+Compact binary snapshots of managed graphs
+
+File layout: magic bytes, JSON header and a number of 8-byte aligned
+sections with integer arrays. All strings (attribute names, values, class
+names) are stored once in a string table. Attribute rows (names and values)
+are stored once too, members refer to them by index. Loaded members share
+attribute names and values tuples the same way as members created with bulk
+API do.
+'''
+
+import gc
+import json
+import sys
+from array import array
+from importlib import import_module
+
+from .members import Attrs, Graph, KeyTable
+
+
+MAGIC = b'GVMSNAP\x01'
+ALIGN = 8
+
+# Member attributes that are stored in dedicated columns
+NODE_SLOTS = frozenset({'graph', 'attrs', '_incoming', '_outgoing'})
+EDGE_SLOTS = frozenset({'start', 'end', 'connector', 'attrs'})
+
+
+def save(graph, path):
+    '''
+    Save graph to a snapshot file
+
+    Pending style rules and other deferred work are applied first. Node and edge classes are saved by
+    name and must be importable when loading. Attributes defined by member
+    subclasses (e.g. DiagramNode.kind) are saved if they are strings.
+    '''
+    graph._before_render()
+    tables = _Tables()
+    node_ids = {}
+    node_class, node_row, node_extra = array('I'), array('I'), array('I')
+    for position, node in enumerate(graph.nodes):
+        node_ids[node] = position
+        node_class.append(tables.cls(type(node)))
+        node_row.append(tables.row(node.attrs._keys.names, node.attrs._values))
+        node_extra.append(tables.extra(node, NODE_SLOTS))
+    edge_class, edge_row, edge_extra = array('I'), array('I'), array('I')
+    edge_start, edge_end, edge_connector = array('I'), array('I'), array('B')
+    for edge in graph.edges:
+        edge_class.append(tables.cls(type(edge)))
+        edge_row.append(tables.row(edge.attrs._keys.names, edge.attrs._values))
+        edge_extra.append(tables.extra(edge, EDGE_SLOTS))
+        edge_start.append(node_ids[edge.start])
+        edge_end.append(node_ids[edge.end])
+        edge_connector.append(edge.connector is not edge.end)
+    string_offsets = array('Q', [0])
+    total = 0
+    for string in tables.strings:
+        total += len(string)
+        string_offsets.append(total)
+    sections = dict(
+        string_offsets=string_offsets,
+        layouts=tables.layouts,
+        rows=tables.rows,
+        node_class=node_class,
+        node_row=node_row,
+        node_extra=node_extra,
+        edge_class=edge_class,
+        edge_row=edge_row,
+        edge_extra=edge_extra,
+        edge_start=edge_start,
+        edge_end=edge_end,
+        edge_connector=edge_connector,
+    )
+    blobs = [(name, data.typecode, data.tobytes()) for name, data in sections.items()]
+    blobs.append(('strings', 'B', ''.join(tables.strings).encode('utf-8')))
+    header = {
+        'byteorder': sys.byteorder,
+        'graph': {
+            'class': _class_name(type(graph)),
+            'graph_cls': _class_name(graph._graph_cls),
+            'node_cls': _class_name(graph._node_cls),
+            'node_attrs': _plain(graph._node_attrs),
+            'edge_cls': _class_name(graph._edge_cls),
+            'edge_attrs': _plain(graph._edge_attrs),
+            'attrs': _plain(vars(graph.attrs)),
+        },
+        'classes': tables.class_names,
+        'sections': {},
+    }
+    position = 0
+    for name, typecode, blob in blobs:
+        header['sections'][name] = [position, len(blob), typecode]
+        position += _padded(len(blob))
+    header = json.dumps(header).encode('utf-8')
+    with open(path, 'wb') as snapshot:
+        snapshot.write(MAGIC)
+        snapshot.write(len(header).to_bytes(8, 'little'))
+        snapshot.write(header)
+        snapshot.write(bytes(_padded(len(header)) - len(header)))
+        for _, _, blob in blobs:
+            snapshot.write(blob)
+            snapshot.write(bytes(_padded(len(blob)) - len(blob)))
+
+
+def load(path):
+    '''
+    Load graph from a snapshot file
+
+    Cyclic garbage collector is paused while members are created: none of
+    them can be garbage yet, and collections triggered by allocating that
+    many objects would take most of the loading time.
+    '''
+    with open(path, 'rb') as snapshot:
+        data = snapshot.read()
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _load(data, path)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _load(data, path):
+    '''Build graph from snapshot bytes'''
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'not a graph snapshot: {path}')
+    size = int.from_bytes(data[len(MAGIC):len(MAGIC) + 8], 'little')
+    start = len(MAGIC) + 8
+    header = json.loads(data[start:start + size])
+    body = start + _padded(size)
+    swap = header['byteorder'] != sys.byteorder
+
+    def section(name):
+        '''Return section contents as a list of numbers (or bytes for strings)'''
+        offset, length, typecode = header['sections'][name]
+        chunk = data[body + offset:body + offset + length]
+        if typecode == 'B':
+            return chunk
+        values = array(typecode, chunk)
+        if swap:
+            values.byteswap()
+        return values.tolist()
+
+    text = section('strings').decode('utf-8')
+    offsets = section('string_offsets')
+    strings = [text[begin:end] for begin, end in zip(offsets, offsets[1:])]
+    strings[0] = None  # see _Tables
+    string = strings.__getitem__
+    layouts = []
+    flat = section('layouts')
+    position = 0
+    while position < len(flat):
+        end = position + 1 + flat[position]
+        names = tuple(sys.intern(strings[index]) for index in flat[position + 1:end])
+        layouts.append((KeyTable.get(names), len(names)))
+        position = end
+    rows = []
+    flat = section('rows')
+    position = 0
+    while position < len(flat):
+        keys, count = layouts[flat[position]]
+        end = position + 1 + count
+        rows.append((keys, tuple(map(string, flat[position + 1:end]))))
+        position = end
+    classes = [_import_class(name) for name in header['classes']]
+
+    meta = header['graph']
+    graph_class = _import_class(meta['class'])
+    graph = graph_class.__new__(graph_class)
+    Graph.__init__(
+        graph,
+        _import_class(meta['graph_cls']),
+        _import_class(meta['node_cls']),
+        meta['node_attrs'],
+        _import_class(meta['edge_cls']),
+        meta['edge_attrs'],
+        **meta['attrs'],
+    )
+
+    new = object.__new__
+    set_keys = Attrs._keys.__set__
+    set_values = Attrs._values.__set__
+    nodes = []
+    append = nodes.append
+    for cls, row in zip(section('node_class'), section('node_row')):
+        keys, values = rows[row]
+        attrs = new(Attrs)
+        set_keys(attrs, keys)
+        set_values(attrs, values)
+        node = new(classes[cls])
+        node.graph = graph
+        node.attrs = attrs
+        node._incoming = node._outgoing = ()
+        append(node)
+    edges = []
+    append = edges.append
+    for cls, row, start, end, connector in zip(
+            section('edge_class'),
+            section('edge_row'),
+            section('edge_start'),
+            section('edge_end'),
+            section('edge_connector')):
+        keys, values = rows[row]
+        attrs = new(Attrs)
+        set_keys(attrs, keys)
+        set_values(attrs, values)
+        edge = new(classes[cls])
+        edge.attrs = attrs
+        edge.start = start = nodes[start]
+        edge.end = end = nodes[end]
+        edge.connector = start if connector else end
+        append(edge)
+    for members, prefix in ((nodes, 'node'), (edges, 'edge')):
+        for member, row in zip(members, section(f'{prefix}_extra')):
+            if row:  # subclass attributes, e.g. DiagramNode.kind
+                keys, values = rows[row]
+                for name, value in zip(keys.names, values):
+                    setattr(member, name, value)
+    graph.nodes = nodes
+    graph.edges = edges  # attached to nodes here (see EdgeList)
+    return graph
+
+
+class _Tables:
+    '''
+    Shared tables of strings, attribute name layouts, rows and classes
+
+    String with index 0 stands for None. Row with index 0 is always empty.
+    '''
+
+    def __init__(self):
+        self.strings = ['']
+        self.string_ids = {}
+        self.layouts = array('I')
+        self.layout_ids = {}
+        self.rows = array('I')
+        self.row_ids = {}
+        self.class_names = []
+        self.class_ids = {}
+        self.row((), ())
+
+    def string(self, value):
+        if value is None:
+            return 0
+        if type(value) is not str:
+            value = str(value)
+        index = self.string_ids.get(value)
+        if index is None:
+            index = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def row(self, names, values):
+        '''Return index of attributes row'''
+        key = (names, values)
+        index = self.row_ids.get(key)
+        if index is None:
+            index = self.row_ids[key] = len(self.row_ids)
+            layout = self.layout_ids.get(names)
+            if layout is None:
+                layout = self.layout_ids[names] = len(self.layout_ids)
+                self.layouts.append(len(names))
+                self.layouts.extend(self.string(name) for name in names)
+            self.rows.append(layout)
+            self.rows.extend(self.string(value) for value in values)
+        return index
+
+    def extra(self, member, known):
+        '''Return index of attributes row for attributes defined by member subclass'''
+        cls = type(member)
+        extras = {}
+        for klass in cls.__mro__:
+            for name in getattr(klass, '__slots__', ()):
+                if name.startswith('__') or name in known or name in extras:
+                    continue
+                if hasattr(member, name):
+                    extras[name] = getattr(member, name)
+        extras.update(getattr(member, '__dict__', {}))
+        for name, value in extras.items():
+            if value is not None and not isinstance(value, str):
+                raise TypeError(f'can not save {cls.__name__}.{name}: only strings are supported, got {value!r}')
+        return self.row(tuple(extras), tuple(extras.values()))
+
+    def cls(self, cls):
+        index = self.class_ids.get(cls)
+        if index is None:
+            index = self.class_ids[cls] = len(self.class_names)
+            self.class_names.append(_class_name(cls))
+        return index
+
+
+def _padded(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _plain(mapping):
+    '''Convert mapping values to JSON compatible types'''
+    return {
+        str(key): value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+        for key, value in mapping.items()
+    }
+
+
+def _class_name(cls):
+    if cls is None:
+        return None
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+
+def _import_class(name):
+    if name is None:
+        return None
+    module_name, _, qualname = name.partition(':')
+    value = import_module(module_name)
+    for part in qualname.split('.'):
+        value = getattr(value, part)
+    return value
@@ -0,0 +1,241 @@
+'''
+Select graph members by their properties and style them in bulk
+
+    from graphviz_managed.style import nodes, edges
+    graph.style(nodes(in_degree=0), color='darkgreen')
+    graph.style(edges(start=nodes(shape='box')), style='dashed')
+'''
+
+
+NODE_PROPERTIES = {'in_degree', 'out_degree'}
+EDGE_PROPERTIES = {'start', 'end'}
+
+
+class Selector:
+    '''
+    Condition that matches graph nodes or edges
+
+    Keyword conditions refer to member attributes. Expected value may be a
+    string (compared with attribute value converted to string), None (matches
+    members without that attribute) or a callable that receives attribute
+    value and returns bool.
+
+    Node selectors also accept in_degree/out_degree conditions (numbers or
+    callables). Edge selectors accept start/end conditions: a node selector,
+    a single node or a collection of nodes.
+
+    If cls is provided, only instances of that class (or tuple of classes) are
+    matched.
+    '''
+
+    def __init__(self, kind, cls=None, **conditions):
+        if kind not in {'node', 'edge'}:
+            raise ValueError(f'unsupported selector kind: {kind}')
+        special = NODE_PROPERTIES if kind == 'node' else EDGE_PROPERTIES
+        self.kind = kind
+        self.cls = cls
+        self.properties = {}
+        self.attrs = {}
+        for name, expected in conditions.items():
+            if name in special:
+                self.properties[name] = expected
+            elif expected is None or callable(expected):
+                self.attrs[name] = expected
+            else:
+                self.attrs[name] = str(expected)
+
+    def __repr__(self):
+        conditions = dict(self.attrs, **self.properties)
+        if self.cls is not None:
+            conditions['cls'] = self.cls
+        args = ', '.join(f'{key}={value!r}' for key, value in conditions.items())
+        return f'<{self.__class__.__name__} {self.kind}({args})>'
+
+
+def nodes(cls=None, **conditions):
+    '''Select nodes (see Selector)'''
+    return Selector('node', cls, **conditions)
+
+
+def edges(cls=None, **conditions):
+    '''Select edges (see Selector)'''
+    return Selector('edge', cls, **conditions)
+
+
+class RuleSheet:
+    '''
+    Ordered collection of styling rules
+
+    Each rule is a selector and a dictionary of attributes to set on matching
+    members. When rules overlap, later rules override earlier ones. Setting an
+    attribute to None removes it.
+
+    All selectors are matched against the graph as it was before applying the
+    rules, so that the order of rules affects only the resulting values.
+    '''
+
+    def __init__(self, rules=()):
+        self.rules = []
+        for selector, attrs in rules:
+            self.add(selector, **attrs)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self.rules)} rules>'
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def add(self, selector, **attrs):
+        '''Append a rule to this sheet'''
+        if not isinstance(selector, Selector):
+            raise TypeError(f'expected Selector, got {selector!r}')
+        attrs = {
+            str(key): value if value is None else str(value)
+            for key, value in attrs.items()
+        }
+        self.rules.append((selector, attrs))
+        return self
+
+    def extend(self, rules):
+        '''Append all rules from another sheet (or iterable of rules)'''
+        for selector, attrs in rules:
+            self.add(selector, **attrs)
+        return self
+
+    def match(self, graph):
+        '''Return a dictionary of matching members and attributes to set'''
+        index = MemberIndex(graph)
+        changes = {}
+        for selector, attrs in self.rules:
+            for member in index.select(selector):
+                found = changes.get(member)
+                if found is None:
+                    changes[member] = dict(attrs)
+                else:
+                    found.update(attrs)
+        return changes
+
+    def apply(self, graph):
+        '''Apply rules to graph members, return the number of modified members'''
+        from .members import update_attrs
+        changes = self.match(graph)
+        for member, attrs in changes.items():
+            update_attrs(member.attrs, attrs)
+        return len(changes)
+
+
+class MemberIndex:
+    '''
+    Lookup tables for evaluating many selectors against the same graph
+
+    Each table is built on first use with a single pass over graph members
+    and is shared by all selectors that refer to the same attribute, class or
+    degree.
+    '''
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._members = {'node': graph.nodes, 'edge': graph.edges}
+        self._tables = {}
+        self._cache = {}
+
+    def select(self, selector):
+        '''Return the set of members matching selector'''
+        key = id(selector)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] is selector:
+            return cached[1]
+        kind = selector.kind
+        candidates = None
+        predicates = []
+        for name, expected in selector.attrs.items():
+            if callable(expected):
+                predicates.append((name, expected))
+            else:
+                candidates = _narrow(candidates, self._lookup(kind, ('attr', name), expected))
+        for name, expected in selector.properties.items():
+            if name in NODE_PROPERTIES:
+                if callable(expected):
+                    table = self._table(kind, ('property', name))
+                    found = set()
+                    for value, members in table.items():
+                        if expected(value):
+                            found.update(members)
+                else:
+                    found = self._lookup(kind, ('property', name), expected)
+            else:
+                found = self._endpoints(name, expected)
+            candidates = _narrow(candidates, found)
+        if selector.cls is not None:
+            table = self._table(kind, ('class',))
+            found = set()
+            for cls, members in table.items():
+                if issubclass(cls, selector.cls):
+                    found.update(members)
+            candidates = _narrow(candidates, found)
+        if candidates is None:
+            candidates = set(self._members[kind])
+        for name, predicate in predicates:
+            candidates = {
+                member for member in candidates
+                if predicate(getattr(member.attrs, name, None))
+            }
+        self._cache[key] = (selector, candidates)
+        return candidates
+
+    def _endpoints(self, name, expected):
+        '''Return the set of edges with start/end node matching expected'''
+        if isinstance(expected, Selector):
+            if expected.kind != 'node':
+                raise ValueError(f'{name} must be selected by a node selector: {expected!r}')
+            nodes = self.select(expected)
+        elif isinstance(expected, (list, tuple, set, frozenset)):
+            nodes = expected
+        else:
+            nodes = (expected,)
+        adjacency = '_outgoing' if name == 'start' else '_incoming'
+        edges = self._members['edge']  # adjacency may list edges outside of graph views
+        found = set()
+        for node in nodes:
+            found.update(edge for edge in getattr(node, adjacency) if edge in edges)
+        return found
+
+    def _lookup(self, kind, key, value):
+        '''Return the set of members with the given value in lookup table'''
+        return self._table(kind, key).get(value, set())
+
+    def _table(self, kind, key):
+        '''Return lookup table: value -> set of members'''
+        table = self._tables.get((kind, key))
+        if table is not None:
+            return table
+        table = self._tables[kind, key] = {}
+        if key[0] == 'attr':
+            name = key[1]
+            for member in self._members[kind]:
+                attrs = member.attrs
+                position = attrs._keys.index.get(name)
+                value = None if position is None else attrs._values[position]
+                found = table.get(value)
+                if found is None:
+                    table[value] = {member}
+                else:
+                    found.add(member)
+        elif key[0] == 'property':
+            name = key[1]
+            for member in self._members[kind]:
+                table.setdefault(getattr(member, name), set()).add(member)
+        elif key[0] == 'class':
+            for member in self._members[kind]:
+                table.setdefault(type(member), set()).add(member)
+        return table
+
+
+def _narrow(candidates, found):
+    '''Intersect candidate set with newly found members (None means all)'''
+    if candidates is None:
+        return set(found)
+    return candidates & found
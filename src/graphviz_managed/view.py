@@ -0,0 +1,205 @@
+'''
+Lightweight views of a part of a large graph
+
+A view shares Node and Edge objects with its parent graph: creating a view
+costs proportional to the size of the slice, nothing is copied. Attributes
+may be overridden per view without modifying the parent, and a view is
+rendered like any other graph.
+'''
+
+import sys
+from functools import lru_cache
+
+from .logging import log
+from .members import Attrs, Graph, MemberList, Node, update_attrs
+from .style import RuleSheet
+
+
+DIRECTIONS = {'both', 'out', 'in'}
+
+
+class GraphView(Graph):
+    '''
+    Selected nodes of parent graph and the edges between them
+
+    Membership is fixed when the view is created, attributes are live:
+    changes made to parent members are visible in all views. Use overlay()
+    or style() to change attributes in this view only. Graph attributes are
+    copied from parent and may be overridden with keyword arguments.
+
+    Node names, style selectors and degree properties are evaluated against
+    parent attributes and parent adjacency. Views can not be modified
+    structurally: add or remove members in parent graph and create a new
+    view instead.
+    '''
+
+    def __init__(self, parent, nodes, **attrs):
+        graph_attrs = vars(parent.attrs)
+        graph_attrs.update(attrs)
+        Graph.__init__(
+            self,
+            graph_cls=parent._graph_cls,
+            node_cls=parent._node_cls,
+            node_attrs=parent._node_attrs,
+            edge_cls=parent._edge_cls,
+            edge_attrs=parent._edge_attrs,
+            **graph_attrs,
+        )
+        self.parent = parent
+        self._overlays = {}  # member -> (changes, base values, merged Attrs)
+        members = parent.nodes
+        selected = set()
+        for node in nodes:
+            if node not in members:
+                raise ValueError(f'node does not belong to parent graph: {node}')
+            selected.add(node)
+        edges = [
+            edge
+            for node in selected
+            for edge in node._outgoing
+            if edge.end in selected
+        ]
+        self.nodes = sorted(selected, key=members.index)  # keep parent order
+        self._edges = MemberList(sorted(edges, key=parent.edges.index))  # adjacency belongs to parent
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} with {len(self.nodes)} nodes, {len(self.edges)} edges of {self.parent}>'
+
+    @classmethod
+    def where(cls, parent, predicate, **attrs):
+        '''Create view of parent nodes for which predicate(node) is true'''
+        return cls(parent, filter(predicate, parent.nodes), **attrs)
+
+    @classmethod
+    def around(cls, parent, nodes, hops=1, direction='both', **attrs):
+        '''
+        Create view of nodes reachable within the given number of hops
+
+        Direction is one of: 'out' (follow edges), 'in' (follow edges
+        backwards) or 'both'. A single node or an iterable of nodes may be
+        provided as the starting point.
+        '''
+        if direction not in DIRECTIONS:
+            raise ValueError(f'direction must be one of {sorted(DIRECTIONS)}, got {direction!r}')
+        if isinstance(nodes, Node):
+            nodes = [nodes]
+        seen = set(nodes)
+        frontier = list(seen)
+        for _ in range(hops):
+            found = []
+            for node in frontier:
+                if direction != 'in':
+                    found.extend(edge.end for edge in node._outgoing if edge.end not in seen)
+                if direction != 'out':
+                    found.extend(edge.start for edge in node._incoming if edge.start not in seen)
+            frontier = [node for node in found if node not in seen and not seen.add(node)]
+            if not frontier:
+                break
+        return cls(parent, seen, **attrs)
+
+    def overlay(self, member, **attrs):
+        '''
+        Set attributes of node or edge in this view only
+
+        Overlays accumulate, attributes set to None are removed from the
+        member in this view.
+        '''
+        if member not in self.nodes and member not in self.edges:
+            raise ValueError(f'member does not belong to this view: {member}')
+        changes = {
+            str(key): value if value is None or type(value) is str else sys.intern(str(value))
+            for key, value in attrs.items()
+        }
+        found = self._overlays.get(member)
+        if found is not None:
+            found[0].update(changes)
+            changes = found[0]
+        self._overlays[member] = (changes, None, None)  # merged on next render
+
+    def attrs_of(self, member):
+        '''Return attributes of member as seen in this view'''
+        overlay = self._attr_overlay()
+        return overlay.get(member, member.attrs)
+
+    def apply_styles(self):
+        '''Apply pending style rules as overlays, return the number of modified members'''
+        if not self._styles:
+            return 0
+        pending, self._styles = self._styles, RuleSheet()
+        log.debug('Applying %s to %s', pending, self)
+        changes = pending.match(self)
+        for member, attrs in changes.items():
+            self.overlay(member, **attrs)
+        return len(changes)
+
+    def _before_render(self):
+        '''Finish deferred work of parent graph too: members are shared'''
+        self.parent._before_render()
+        super()._before_render()
+
+    def _attr_overlay(self):
+        '''
+        Return mapping of members to their attributes in this view
+
+        Merged attributes are reused until parent attributes of a member
+        change, so that cached dot fragments stay valid between renders.
+        '''
+        inherited = self.parent._attr_overlay()
+        overlays = self._overlays
+        result = dict(inherited) if inherited else {}
+        for member, (changes, base, merged) in overlays.items():
+            attrs = result.get(member, member.attrs)
+            if merged is None or base is not attrs._values:
+                merged = Attrs.from_table(attrs._keys, attrs._values)
+                update_attrs(merged, changes)
+                overlays[member] = (changes, attrs._values, merged)
+            result[member] = merged
+        return result
+
+    def materialize(self):
+        '''
+        Return a standalone graph with copies of view members
+
+        Overlays are applied to the copies. The result is an instance of
+        parent graph class (not a view) and may be modified freely.
+        '''
+        from .reduce import copy_graph
+        standalone = copy_graph(self)
+        del standalone.parent
+        del standalone._overlays
+        standalone.__class__ = next(
+            cls for cls in self.__class__.__mro__
+            if issubclass(cls, Graph) and not issubclass(cls, GraphView)
+        )
+        return standalone
+
+    def save(self, path):
+        '''Save a standalone copy of this view (see materialize) to a snapshot file'''
+        self.materialize().save(path)
+
+    def sources(self):
+        '''List of nodes with no incoming edges in this view'''
+        ends = {edge.end for edge in self.edges}
+        return [node for node in self.nodes if node not in ends]
+
+    def sinks(self):
+        '''List of nodes with no outgoing edges in this view'''
+        starts = {edge.start for edge in self.edges}
+        return [node for node in self.nodes if node not in starts]
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} can not be modified, change parent graph instead')
+
+    node = edge = add_nodes = add_edges = _read_only
+    remove_edge = remove_node = contract = replace = _read_only
+    merge_edges = transitive_reduction = collapse_components = _read_only
+
+
+@lru_cache(maxsize=None)
+def view_class(graph_cls):
+    '''Return view class that keeps rendering behavior of graph class'''
+    if issubclass(graph_cls, GraphView):
+        return graph_cls
+    if graph_cls is Graph:
+        return GraphView
+    return type(f'{graph_cls.__name__}View', (GraphView, graph_cls), {})
@@ -0,0 +1,229 @@
+'''
+Check adjacency index maintained by Graph
+'''
+
+
+import pickle
+from time import perf_counter
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.members import Edge, MemberList, Node
+
+
+def test_degrees():
+    '''Check incoming/outgoing edges and node degrees'''
+    graph = Graph()
+    a, b, c, d = (graph.node(label=letter) for letter in 'abcd')
+    ab, ac = a >> [b, c]
+    cb = c >> b
+    assert a.outgoing == [ab, ac]
+    assert a.incoming == []
+    assert b.incoming == [ab, cb]
+    assert (b.in_degree, b.out_degree) == (2, 0)
+    assert (c.in_degree, c.out_degree) == (1, 1)
+    assert graph.sources() == [a, d]
+    assert graph.sinks() == [b, d]
+
+
+def test_remove_edge():
+    '''Check that adjacency index stays correct after removing edges'''
+    graph = Graph()
+    a, b, c = (graph.node(label=letter) for letter in 'abc')
+    ab = a >> b
+    bc = b >> c
+    graph.remove_edge(ab)
+    assert ab not in graph.edges
+    assert a.outgoing == []
+    assert b.incoming == []
+    assert graph.sources() == [a, b]
+    assert graph.sinks() == [a, c]
+    assert 'a -> b' not in graph.render()
+
+
+def test_remove_node():
+    '''Check that removing nodes keeps order, indexing and output stable'''
+    graph = Graph()
+    a, b, c, d = (graph.node(label=letter) for letter in 'abcd')
+    ab, bc, cd, bb = a >> b, b >> c, c >> d, b >> b
+    graph.render()
+    assert graph.remove_node(b) == [bc, bb, ab]
+    assert list(graph.nodes) == [a, c, d]
+    assert list(graph.edges) == [cd]
+    assert graph.nodes[1] is c and graph.nodes.index(d) == 2
+    assert (a.out_degree, c.in_degree) == (0, 0)
+    expected = Graph()
+    expected.node(label='a')
+    expected.node(label='c') >> expected.node(label='d')
+    assert graph.render() == expected.render()
+    with pytest.raises(ValueError):
+        graph.remove_node(b)
+    assert graph.remove_node(a) == []
+
+    hub = graph.node(label='hub')
+    leaves = graph.add_nodes(dict(label=[str(index) for index in range(1000)]))
+    graph.add_edges([(hub, leaf) for leaf in leaves] * 2)
+    graph.add_edges([(leaves[0], hub)])
+    assert len(graph.remove_node(hub)) == 2001
+    assert leaves[0].outgoing == leaves[0].incoming == []
+    assert list(graph.edges) == [cd]
+
+
+@pytest.mark.parametrize('mutate', [
+    lambda graph, bc: graph.edges.remove(bc),
+    lambda graph, bc: graph.edges.__delitem__(1),
+    lambda graph, bc: graph.edges.__delitem__(slice(1, 2)),
+    lambda graph, bc: graph.edges.pop(1),
+    lambda graph, bc: graph.edges.__setitem__(slice(1, 2), []),
+    lambda graph, bc: setattr(graph, 'edges', [edge for edge in graph.edges if edge is not bc]),
+])
+def test_edge_list_removal(mutate):
+    '''Check that removing edges with list methods keeps adjacency index current'''
+    graph = Graph()
+    a, b, c = (graph.node(label=letter) for letter in 'abc')
+    ab, bc, ca = a >> b, b >> c, c >> a
+    mutate(graph, bc)
+    assert list(graph.edges) == [ab, ca]
+    assert b.outgoing == c.incoming == []
+    assert a.outgoing == [ab] and a.incoming == [ca]
+    assert 'b -> c' not in graph.render()
+
+
+def test_edge_list_changes():
+    '''Check that adding and replacing edges with list methods updates adjacency index'''
+    graph = Graph()
+    a, b, c = (graph.node(label=letter) for letter in 'abc')
+    ab = a >> b
+    bc = Edge(b, c)
+    graph.edges.append(bc)
+    assert b.outgoing == [bc] and c.incoming == [bc]
+    ca = Edge(c, a)
+    graph.edges[0] = ca
+    assert list(graph.edges) == [ca, bc]
+    assert a.outgoing == [] and a.incoming == [ca]
+    graph.edges[0], graph.edges[1] = graph.edges[1], graph.edges[0]
+    assert list(graph.edges) == [bc, ca] and c.outgoing == [ca]
+    graph.edges += [ab]
+    assert a.outgoing == [ab]
+    graph.edges = [ab]
+    assert b.outgoing == c.incoming == c.outgoing == [] and b.incoming == [ab]
+    restored = pickle.loads(pickle.dumps(graph))
+    assert restored.nodes[0].outgoing == restored.nodes[1].incoming == list(restored.edges)
+    graph.edges.clear()
+    assert all(node.in_degree == node.out_degree == 0 for node in graph.nodes)
+
+
+def test_remove_leaves_scaling():
+    '''Check that removing leaves of a hub one by one takes linear time'''
+    def remove_leaves(count):
+        graph = Graph()
+        hub = graph.node(label='hub')
+        leaves = graph.add_nodes(dict(label=[str(index) for index in range(count)]))
+        graph.add_edges([(hub, leaf) for leaf in leaves])
+        graph.add_edges([(leaf, hub) for leaf in leaves])
+        started = perf_counter()
+        for leaf in leaves:
+            graph.remove_node(leaf)
+        elapsed = perf_counter() - started
+        assert hub.outgoing == hub.incoming == [] and list(graph.edges) == []
+        return elapsed
+    small = min(remove_leaves(2000) for _ in range(3))
+    assert remove_leaves(16000) < 24 * small  # quadratic would be 64 times slower
+
+
+def test_contract_replace():
+    '''Check moving edges between nodes'''
+    graph = Graph()
+    a, b, c, d = (graph.node(label=letter) for letter in 'abcd')
+    ab, bc, db, ca = a >> b, b << c, d >> b, c >> a
+    assert graph.contract(a, b) is a
+    assert list(graph.nodes) == [a, c, d]
+    assert list(graph.edges) == [bc, db, ca]
+    assert (bc.start, bc.end) == (c, a)
+    assert (db.start, db.end, db.connector) == (d, a, a)
+    assert a.incoming == [ca, bc, db]
+    assert b.incoming == b.outgoing == []
+
+    e = Node(graph=None, label='e')
+    assert graph.replace(c, e) is e
+    assert list(graph.nodes) == [a, e, d]
+    assert e.outgoing == [bc, ca] and c.outgoing == []
+    assert e.graph is graph
+    assert 'e -> a' in graph.render() and 'c' not in graph.render()
+    with pytest.raises(ValueError):
+        graph.replace(a, d)
+    with pytest.raises(ValueError):
+        graph.contract(a, a)
+
+
+def test_member_list():
+    '''Check list behavior of indexed member storage'''
+    members = MemberList('abcdef')
+    for letter in 'bdf':
+        members.remove(letter)
+    assert members == ['a', 'c', 'e'] and len(members) == 3
+    assert list(reversed(members)) == ['e', 'c', 'a']
+    assert 'b' not in members and 'c' in members
+    members[1:2] = ['x', 'y']
+    members.replace('a', 'z')
+    assert members == ['z', 'x', 'y', 'e']
+    assert members.index('y') == 2 and members[-1] == 'e'
+    assert pickle.loads(pickle.dumps(members)) == members
+    with pytest.raises(ValueError):
+        members.append('x')
+    with pytest.raises(ValueError):
+        members.extend(['q', 'q'])
+    assert members == ['z', 'x', 'y', 'e'] and 'q' not in members
+
+
+@pytest.mark.parametrize('operation', [
+    lambda items: items.append('x'),
+    lambda items: items.extend('xy'),
+    lambda items: items.insert(2, 'x'),
+    lambda items: items.insert(-2, 'x'),
+    lambda items: items.insert(100, 'x'),
+    lambda items: items.pop(),
+    lambda items: items.pop(0),
+    lambda items: items.pop(-3),
+    lambda items: items.remove('c'),
+    lambda items: items.__delitem__(1),
+    lambda items: items.__delitem__(slice(1, None, 2)),
+    lambda items: items.__setitem__(1, 'x'),
+    lambda items: items.__setitem__(slice(0, 2), 'xyz'),
+    lambda items: items.reverse(),
+    lambda items: items.sort(),
+    lambda items: items.sort(key=ord, reverse=True),
+    lambda items: items.clear(),
+    lambda items: items.__iadd__('xy'),
+    lambda items: items.index('e'),
+    lambda items: items.count('e'),
+    lambda items: items[-2:],
+    lambda items: items + ['x'],
+    lambda items: ['x'] + items,
+    lambda items: items.copy(),
+])
+def test_member_list_methods(operation):
+    '''Check that list methods behave the same as for plain list'''
+    expected = list('gebfcda')
+    members = MemberList(expected)
+    members.remove('b')  # start with a hole
+    expected.remove('b')
+    result = operation(members)
+    assert result == operation(expected)
+    assert members == expected
+    assert [members.index(item) for item in expected] == list(range(len(expected)))
+    assert list(reversed(members)) == expected[::-1]
+
+
+def test_member_list_swap():
+    '''Check that assigning a member already in the list swaps the two'''
+    members = MemberList('abcd')
+    members[0], members[2] = members[2], members[0]
+    assert members == list('cbad')
+    members[-1] = 'b'
+    assert members == list('cdab')
+    assert [members.index(item) for item in 'abcd'] == [2, 3, 0, 1]
+    assert (members.pop(), members.pop()) == ('b', 'a')
+    assert members == ['c', 'd'] and 'a' not in members
+    with pytest.raises(IndexError):
+        MemberList().pop()
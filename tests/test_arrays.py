@@ -0,0 +1,53 @@
+'''
+Check export and import of graph topology as NumPy arrays
+'''
+
+
+import pytest
+from graphviz_managed import Graph
+
+np = pytest.importorskip('numpy')
+
+
+def test_to_arrays():
+    '''Check edge index, CSR arrays and attribute columns'''
+    graph = Graph()
+    a, b, c = graph.add_nodes([dict(label='a', weight=1), dict(label='b', weight=2), dict(label='c')])
+    graph.add_edges([(b, c), (a, b), (a, c), (c, a)])
+    arrays = graph.to_arrays(node_attrs={'weight': float}, edge_attrs=['color'])
+    assert arrays.edge_index.tolist() == [[1, 0, 0, 2], [2, 1, 2, 0]]
+    assert arrays.indptr.tolist() == [0, 2, 3, 4]
+    assert arrays.indices.tolist() == [1, 2, 2, 0]
+    assert arrays.edge_order.tolist() == [1, 2, 0, 3]
+    assert arrays.node_attrs['weight'][:2].tolist() == [1.0, 2.0]
+    assert np.isnan(arrays.node_attrs['weight'][2])
+    assert arrays.edge_attrs['color'].tolist() == [None] * 4
+
+    in_degree = np.bincount(arrays.edge_index[1], minlength=arrays.num_nodes)
+    arrays.set_node_attrs(penwidth=in_degree, weight=[None, '3', '4'])
+    assert vars(a.attrs) == dict(label='a', penwidth='1')
+    assert vars(c.attrs) == dict(label='c', penwidth='2', weight='4')
+    with pytest.raises(ValueError):
+        arrays.set_edge_attrs(color=['red'])
+
+
+def test_from_arrays():
+    '''Check that graph built from arrays matches the original'''
+    graph = Graph(rankdir='LR')
+    a, b, c = graph.add_nodes(dict(label=list('abc')), shape='box')
+    graph.add_edges([(a, b, dict(color='red')), (b, c), (c, a)])
+    arrays = graph.to_arrays(node_attrs=['label', 'shape'], edge_attrs=['color'])
+    copy = Graph.from_arrays(
+        arrays.edge_index,
+        node_attrs=arrays.node_attrs,
+        edge_attrs=arrays.edge_attrs,
+        rankdir='LR',
+    )
+    assert copy.render() == graph.render()
+
+    numbered = Graph.from_arrays(np.array([[0, 1], [1, 3]]))
+    assert [node.attrs.label for node in numbered.nodes] == ['0', '1', '2', '3']
+    with pytest.raises(ValueError):
+        Graph.from_arrays([[0, 5]], num_nodes=2)
+    with pytest.raises(ValueError):
+        Graph.from_arrays([[0], [5]], num_nodes=2)
@@ -0,0 +1,52 @@
+'''
+Check compact attribute storage for graph members
+'''
+
+
+import pickle
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.members import parse_attrs
+
+
+def test_attribute_access():
+    '''Check that attrs behave like argparse.Namespace'''
+    attrs = parse_attrs(dict(label='a', penwidth=0.5))
+    assert attrs.label == 'a'
+    assert attrs.penwidth == '0.5'
+    attrs.color = 'red'
+    attrs.label = 'b'
+    del attrs.penwidth
+    assert vars(attrs) == dict(label='b', color='red')
+    assert 'color' in attrs
+    assert not hasattr(attrs, 'penwidth')
+    with pytest.raises(AttributeError):
+        attrs.shape
+
+
+def test_vars_is_a_copy():
+    '''Check that modifying vars() result does not change attrs'''
+    attrs = parse_attrs(dict(label='a'))
+    vars(attrs).pop('label')
+    assert attrs.label == 'a'
+
+
+def test_shared_keys():
+    '''Check that attribute names are shared between objects'''
+    first = parse_attrs(dict(label='a', shape='box'))
+    second = parse_attrs(dict(label='b', shape='box'))
+    assert first._keys is second._keys
+    first.color = 'red'
+    second.color = 'blue'
+    assert first._keys is second._keys
+
+
+def test_pickle():
+    '''Check that graphs with slotted members survive pickling'''
+    graph = Graph(label='Pickled')
+    a = graph.node(label='a')
+    b = graph.node(label='b', color='red')
+    a >> b
+    restored = pickle.loads(pickle.dumps(graph))
+    assert restored.render() == graph.render()
+    assert restored.nodes[0].outgoing[0].end is restored.nodes[1]
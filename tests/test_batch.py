@@ -0,0 +1,45 @@
+'''
+Check parallel batch rendering
+'''
+
+
+import threading
+from graphviz_managed import Graph, render_many
+from graphviz_managed import engine
+
+
+def sample_graph(label):
+    graph = Graph()
+    a = graph.node(label=label)
+    b = graph.node(label='b')
+    a >> b
+    return graph
+
+
+def test_render_many(tmp_path, monkeypatch):
+    '''Check that graphs are rendered via a pool and errors do not abort the batch'''
+    calls = []
+    lock = threading.Lock()
+    def pipe(lines, fmt, output=None, engine=engine.DEFAULT_ENGINE):
+        source = ''.join(lines)
+        if 'broken' in source:
+            raise RuntimeError('layout failed')
+        with lock:
+            calls.append(output)
+        output.write_text(f'{fmt}\n{source}')
+    monkeypatch.setattr(engine, 'pipe', pipe)
+
+    jobs = [(sample_graph(f'node{index}'), tmp_path / f'graph{index}.svg') for index in range(10)]
+    jobs.append((sample_graph('broken'), tmp_path / 'broken.svg'))
+    jobs.append((sample_graph('duplicate'), tmp_path / 'graph0.svg'))
+    jobs.append((sample_graph('source'), tmp_path / 'graph.dot'))
+    results = render_many(jobs, workers=3)
+
+    assert [result.target for result in results] == [target for _, target in jobs]
+    assert all(result.ok for result in results[:10])
+    assert 'layout failed' in str(results[10].error)
+    assert 'more than once' in str(results[11].error)
+    assert results[12].ok
+    assert len(calls) == 10
+    assert (tmp_path / 'graph3.svg').read_text().startswith('svg\ndigraph {\n\tnode3')
+    assert (tmp_path / 'graph.dot').read_text() == jobs[12][0].render()
@@ -0,0 +1,69 @@
+'''
+Check bulk graph construction API
+'''
+
+
+import csv
+import io
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.custom import WrapLongLabelNode
+
+
+def one_by_one():
+    '''Reference graph built with node() and edge() calls'''
+    graph = Graph(node_attrs=dict(shape='box'), edge_attrs=dict(color='gray'))
+    a = graph.node(label='a')
+    b = graph.node(label='b', shape='ellipse')
+    c = graph.node(label='c')
+    graph.edge(a, b, weight=2)
+    graph.edge(b, c, weight=2, color='red')
+    graph.edge(c, a, weight=2)
+    return graph
+
+
+def test_rows():
+    '''Check that bulk construction produces the same graph'''
+    graph = Graph(node_attrs=dict(shape='box'), edge_attrs=dict(color='gray'))
+    a, b, c = graph.add_nodes([
+        dict(label='a'),
+        dict(label='b', shape='ellipse'),
+        dict(label='c'),
+    ])
+    edges = graph.add_edges([(a, b), (b, c, dict(color='red')), dict(start=c, end=a)], weight=2)
+    assert graph.render() == one_by_one().render()
+    assert edges == graph.edges
+    assert a.outgoing == [edges[0]]
+    assert a.incoming == [edges[2]]
+    assert edges[0].connector is b
+
+
+def test_columns():
+    '''Check that columnar input is supported'''
+    graph = Graph(node_attrs=dict(shape='box'), edge_attrs=dict(color='gray'))
+    a, b, c = graph.add_nodes(dict(label=['a', 'b', 'c'], shape=['box', 'ellipse', 'box']))
+    graph.add_edges(dict(start=[a, b, c], end=[b, c, a], color=['gray', 'red', 'gray']), weight=2)
+    assert graph.render() == one_by_one().render()
+    with pytest.raises(ValueError):
+        graph.add_nodes(dict(label=['a', 'b'], shape=['box']))
+
+
+def test_csv():
+    '''Check that edges may reference nodes by name'''
+    nodes_csv = io.StringIO('id,label\nx,a\ny,b\nz,c\n')
+    edges_csv = io.StringIO('start,end,color\nx,y,gray\ny,z,red\nz,x,gray\n')
+    graph = Graph(node_attrs=dict(shape='box'))
+    rows = list(csv.DictReader(nodes_csv))
+    added = graph.add_nodes({'label': row['label']} for row in rows)
+    nodes = {row['id']: node for row, node in zip(rows, added)}
+    graph.add_edges(csv.DictReader(edges_csv), nodes=nodes, weight=2)
+    graph.nodes[1].attrs.shape = 'ellipse'
+    assert graph.render() == one_by_one().render()
+
+
+def test_custom_node_class():
+    '''Check that custom node classes are initialized properly'''
+    graph = Graph(node_cls=WrapLongLabelNode)
+    node, = graph.add_nodes([dict(label='Long label that will be wrapped into multiple lines')])
+    assert isinstance(node, WrapLongLabelNode)
+    assert r'\n' in node.attrs.label
@@ -0,0 +1,80 @@
+'''
+Check render cache
+'''
+
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.members import DotSource
+from graphviz_managed.cache import RenderCache
+
+
+@pytest.fixture
+def fake_graphviz(monkeypatch):
+    '''Replace Graphviz execution with a call counter'''
+    calls = []
+    def save(self, foreign, filename, fileformat):
+        calls.append(filename)
+        with open(filename, 'wb') as f:
+            f.write(f'{fileformat}:{self._dot_foreign_graph(foreign)}'.encode())
+    monkeypatch.setattr(Graph, '_save_foreign_graph', save)
+    return calls
+
+
+def sample_graph(label='a'):
+    graph = Graph()
+    a = graph.node(label=label)
+    b = graph.node(label='b')
+    a >> b
+    return graph
+
+
+def test_render_cache_memory(tmp_path, fake_graphviz):
+    '''Check that identical graphs are rendered only once'''
+    cache = RenderCache()
+    sample_graph().render(tmp_path / 'first.svg', cache=cache)
+    sample_graph().render(tmp_path / 'second.svg', cache=cache)
+    sample_graph().render(tmp_path / 'third.png', cache=cache)
+    sample_graph('c').render(tmp_path / 'fourth.svg', cache=cache)
+    assert len(fake_graphviz) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert (tmp_path / 'first.svg').read_bytes() == (tmp_path / 'second.svg').read_bytes()
+
+
+def test_render_cache_serialize_once(tmp_path, fake_graphviz, monkeypatch):
+    '''Check that dot source is serialized once on cache miss'''
+    passes = []
+    serialize = DotSource.__iter__
+    def counted(self):
+        passes.append(self)
+        return serialize(self)
+    monkeypatch.setattr(DotSource, '__iter__', counted)
+    graph = sample_graph()
+    graph.render(tmp_path / 'graph.svg', cache=RenderCache())
+    assert len(passes) == 1
+    assert graph.last_render_stats.dot_bytes > 0
+    assert (tmp_path / 'graph.svg').read_text() == f'svg:{"".join(serialize(graph._make_foreign_graph()))}'
+
+
+def test_render_cache_disk(tmp_path, fake_graphviz):
+    '''Check that disk cache survives between cache instances'''
+    directory = tmp_path / 'cache'
+    sample_graph().render(tmp_path / 'first.svg', cache=RenderCache(directory))
+    cache = RenderCache(directory)
+    sample_graph().render(tmp_path / 'second.svg', cache=cache)
+    assert len(fake_graphviz) == 1
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_render_cache_eviction(tmp_path):
+    '''Check that least recently used entries are evicted'''
+    cache = RenderCache(tmp_path, disk_size=25, memory_size=25)
+    cache.put('a', b'0' * 10)
+    cache.put('b', b'1' * 10)
+    assert cache.get('a') == b'0' * 10
+    cache.put('c', b'2' * 10)
+    assert cache.get('b') is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['a', 'c']
+    cache.clear()
+    assert cache.get('a') is None
+    assert list(tmp_path.iterdir()) == []
@@ -30,3 +30,39 @@ def test_diagrams_compatibility():
                 assert 'shape=none' in line
         if line.strip().startswith('graph'):
             assert 'label="Fancy node templates' in line
+
+
+def test_diagrams_native_output():
+    '''Check that dot source written directly matches diagrams package output'''
+    import re
+    from graphviz_managed.diagrams import Diagram
+    def build(**kwargs):
+        diag = Diagram(label='Native', pad=0.1, **kwargs)
+        lb = diag.node(kind='aws.network.ELB', label='lb')
+        web = diag.node(kind='aws.compute.EC2', label='web\nserver')
+        db = diag.node(kind='onprem.database.Postgresql', label='db')
+        lb >> web
+        diag.edge(web, db, label='queries', color='red', penwidth=2)
+        return diag
+    native = build().render()
+    legacy = build(graph_cls=diagrams.Diagram).render()
+    assert diagrams.getdiagram() is None
+    ids = re.findall(r'^\t"?(\w{32})"? \[', legacy, re.MULTILINE)
+    for node_id, name in zip(ids, ['lb', 'webserver', 'db']):
+        legacy = re.sub(f'"?{node_id}"?', name, legacy)
+    assert native == legacy
+
+
+def test_kind_registry(tmp_path):
+    '''Check that icon lookup results match diagrams classes and can be saved'''
+    from graphviz_managed.diagrams import KindRegistry, load_class
+    path = tmp_path / 'kinds.json'
+    registry = KindRegistry(path)
+    for kind in ['diagrams.aws.network.ELB', 'diagrams.gcp.compute.GCE', 'diagrams.k8s.compute.Pod']:
+        icon, height = registry[kind]
+        cls = load_class(kind)
+        assert (icon, height) == (cls._load_icon(cls), cls._height)
+    registry.save()
+    saved = KindRegistry(path)
+    assert len(saved) == 3
+    assert saved['diagrams.aws.network.ELB'] == registry['diagrams.aws.network.ELB']
@@ -115,13 +115,41 @@ def test_node_attrs():
     reference = dedent('''\
         digraph {
         	Defaultnodetext [label="Default node text" shape=note]
-        	Defaultnodetext_ [label="Default node text" shape=note]
+        	Defaultnodetext_1 [label="Default node text" shape=note]
         	NodeB [label="Node B" shape=box]
         }
         ''')
     assert render.strip() == reference.strip()
 
 
+def test_node_names():
+    '''Check that duplicate node names get numeric suffixes'''
+    graph = Graph()
+    for _ in range(3):
+        graph.node(label='worker')
+    graph.node(name='worker_2', label='explicit')
+    graph.node(label='worker')
+    render = graph.render()
+    for name in ['worker', 'worker_1', 'worker_2', 'worker_2_1', 'worker_3']:
+        assert f'\t{name} [' in render
+    assert graph.render() == render
+    assert not hasattr(graph.nodes[0].attrs, 'name')
+
+
+def test_node_names_underscore():
+    '''Check backwards compatible node naming'''
+    graph = Graph()
+    graph.NODE_NAMING = 'underscore'
+    a = graph.node(label='a')
+    a1 = graph.node(name='a_', label='explicit')
+    a2 = graph.node(label='a')
+    a3 = graph.node(label='a')
+    a >> a3
+    render = graph.render()
+    for line in ['\ta_ [label=explicit]', '\ta__ [label=a]', '\ta___ [label=a]', '\ta -> a___']:
+        assert line in render
+
+
 def test_graph_attrs_numbers():
     '''Check numbers in graph attr values are converted to strings before rendering'''
     graph = Graph(label='Graph Title', fontsize=20)
@@ -136,3 +164,22 @@ def test_graph_attrs_numbers():
         }
         ''')
     assert render.strip() == reference.strip()
+
+
+def test_native_dot_matches_graphviz():
+    '''Check that native dot writer produces the same output as graphviz.Digraph'''
+    import graphviz
+    def build(graph_cls):
+        graph = Graph(graph_cls=graph_cls, label='Quoting "test"', fontsize=20)
+        a = graph.node(label='Node A', shape='box', color='red')
+        b = graph.node(label='<<b>html</b>>', penwidth=0.5)
+        c = graph.node(label='graph')
+        d = graph.node(label='Node A')
+        e = graph.node(name='port:in', label='port')
+        a >> [b, c] >> d
+        graph.edge(d, a, label='back edge', style='dashed', weight=2)
+        graph.edge(e, a)
+        return graph
+    native = build(None).render()
+    foreign = build(graphviz.Digraph).render()
+    assert native == foreign
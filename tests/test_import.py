@@ -0,0 +1,69 @@
+'''
+Check that importing the package stays cheap
+'''
+
+
+import os
+import subprocess
+import sys
+
+
+# Importing the package (or a submodule) must not load any of these
+HEAVY_MODULES = {
+    'asyncio',
+    'concurrent.futures',
+    'diagrams',
+    'graphviz',
+    'subprocess',
+}
+
+# Generous limit for cumulative import time of the package, microseconds
+IMPORT_BUDGET = 50_000
+
+
+def import_times(statement):
+    '''Run statement in a fresh interpreter, return cumulative import times'''
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_import_package():
+    '''Check that backends are not loaded by importing the package'''
+    times = import_times('import graphviz_managed')
+    assert not HEAVY_MODULES & set(times)
+    assert 'graphviz_managed.members' not in times
+    assert times['graphviz_managed'] < IMPORT_BUDGET
+
+
+def test_import_graph():
+    '''Check that building graphs does not require rendering backends'''
+    times = import_times(
+        'from graphviz_managed import Graph; '
+        'import graphviz_managed.diagrams; '
+        'graph = Graph(); graph.node(label="a") >> graph.node(label="b"); '
+        "''.join(graph.iter_dot())"
+    )
+    assert not HEAVY_MODULES & set(times)
+
+
+def test_import_submodules():
+    '''Check that submodules are available as package attributes'''
+    import_times(  # fails if the statement raises
+        'import graphviz_managed; '
+        'graphviz_managed.logging.log; '
+        'graphviz_managed.members.Graph; '
+        'assert not hasattr(graphviz_managed, "missing")'
+    )
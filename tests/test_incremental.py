@@ -0,0 +1,45 @@
+'''
+Check that cached dot fragments are invalidated on changes
+'''
+
+
+import pickle
+from graphviz_managed import Graph
+
+
+def fresh_render(graph):
+    '''Render graph with caching disabled'''
+    restored = pickle.loads(pickle.dumps(graph))
+    restored.CACHE_DOT_FRAGMENTS = False
+    return restored.render()
+
+
+def test_incremental_render():
+    '''Check that re-rendering after modifications matches full render'''
+    graph = Graph()
+    graph.CACHE_DOT_FRAGMENTS = True
+    a, b, c = graph.add_nodes(dict(label=['a', 'b', 'c']))
+    ab, bc = graph.add_edges([(a, b), (b, c)], color='gray')
+    for _ in range(3):
+        graph.render()
+    fragments = dict(graph._dot_fragments)
+    assert set(fragments) == {a, b, c, ab, bc}
+
+    b.attrs.color = 'red'
+    bc.attrs.color = 'blue'
+    render = graph.render()
+    assert render == fresh_render(graph)
+    assert 'b [label=b color=red]' in render
+    assert 'b -> c [color=blue]' in render
+    assert graph._dot_fragments[a] is fragments[a]
+    assert graph._dot_fragments[ab] is fragments[ab]
+
+    a.attrs.label = 'b'  # renames nodes and edges
+    assert graph.render() == fresh_render(graph)
+    assert '\tb -> b_1 [color=gray]' in graph.render()
+
+    d = graph.node(label='d')
+    d >> a
+    graph.remove_edge(bc)
+    assert graph.render() == fresh_render(graph)
+    assert bc not in graph._dot_fragments
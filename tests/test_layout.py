@@ -0,0 +1,104 @@
+'''
+Check reusing node positions between renders
+'''
+
+
+import json
+import shutil
+import sys
+from textwrap import dedent
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.layout import Layout
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    '''Engine that places nodes on a diagonal and logs its arguments'''
+    script = tmp_path / 'fake-engine'
+    script.write_text(dedent(f'''\
+        #!{sys.executable}
+        import re, sys
+        source = sys.stdin.read()
+        with open({str(tmp_path / 'calls.log')!r}, 'a') as log:
+            log.write(' '.join(sys.argv[1:]) + '\\n')
+        names = re.findall(r'^\\t(\\w+)(?: \\[|$)', source, re.MULTILINE)
+        fmt = None
+        for arg in sys.argv[1:]:
+            if arg.startswith('-T'):
+                fmt = arg[2:]
+            elif arg.startswith('-o'):
+                with open(arg[2:], 'w') as output:
+                    if fmt == 'plain':
+                        for index, name in enumerate(names):
+                            output.write(f'node {{name}} {{index}} {{index}}.5 1 0.5 x solid ellipse black lightgrey\\n')
+                        output.write('stop\\n')
+                    else:
+                        output.write(fmt + ':' + source)
+        '''))
+    script.chmod(0o755)
+    return str(script)
+
+
+def sample_graph():
+    graph = Graph()
+    a = graph.node(label='a')
+    b = graph.node(label='b')
+    a >> b
+    return graph
+
+
+def test_layout_reuse(fake_engine, tmp_path):
+    '''Check that positions are captured and known nodes are pinned'''
+    graph = sample_graph()
+    sidecar = tmp_path / 'layout.json'
+    layout = Layout(engine=fake_engine, pin_engine=fake_engine, path=sidecar)
+    output = tmp_path / 'graph.svg'
+
+    graph.render(output, layout=layout)
+    assert layout.positions == {'a': (0, 36), 'b': (72, 108)}
+    assert 'pos=' not in output.read_text()
+    assert graph.last_render_stats.engine == fake_engine
+
+    graph.render(output, layout=layout)
+    assert 'a [label=a pos="0,36!"]' in output.read_text()
+    assert 'splines=true' in output.read_text()
+    assert not any(hasattr(node.attrs, 'pos') for node in graph.nodes)
+    assert vars(graph.attrs) == {}  # splines are set on the pinned copy only
+    assert 'splines' not in graph.render()
+
+    graph.nodes[1] >> graph.node(label='c')
+    graph.render(output, layout=Layout(engine='missing', pin_engine=fake_engine, path=sidecar))
+    assert 'c [label=c]' in output.read_text()
+    calls = (tmp_path / 'calls.log').read_text().splitlines()
+    assert [{'-n', '-s'}.intersection(call.split()) for call in calls] == [set(), {'-n'}, {'-s'}]
+    assert set(json.loads(sidecar.read_text())['positions']) == {'a', 'b', 'c'}
+
+    with pytest.raises(ValueError, match='layout can not be combined'):
+        graph.render(output, layout=layout, policy=object())
+
+
+def test_layout_capture():
+    '''Check parsing of quoted node names and forgetting removed nodes'''
+    layout = Layout()
+    layout.capture(dedent('''\
+        graph 1 2 3
+        node "say \\"hi\\"" 1 2 0.75 0.5 "say \\"hi\\"" solid ellipse black lightgrey
+        node removed 0 0 0.75 0.5 removed solid ellipse black lightgrey
+        edge a b 4 1 2 1 2 1 2 1 2 solid black
+        stop
+        '''), ['say "hi"'])
+    assert layout.positions == {'say "hi"': (72, 144)}
+
+
+@pytest.mark.skipif(shutil.which('neato') is None, reason='Graphviz executables not available')
+def test_layout_graphviz(tmp_path):
+    '''Check that real Graphviz keeps positions of known nodes'''
+    graph = sample_graph()
+    layout = Layout()
+    graph.render(tmp_path / 'first.svg', layout=layout)
+    first = dict(layout.positions)
+    graph.nodes[0] >> graph.node(label='c')
+    graph.render(tmp_path / 'second.svg', layout=layout)
+    assert {name: layout.positions[name] for name in first} == pytest.approx(first)
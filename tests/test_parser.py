@@ -0,0 +1,93 @@
+'''
+Check dot language parser
+'''
+
+
+import io
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.parser import DotSyntaxError, parse
+
+
+SOURCE = r'''
+/* leading comment */ strict digraph "sample" {
+    // graph attributes
+    label="Say \"hi\""; rankdir=LR
+    node [shape=box]
+    a -> b -> c [color=red];
+    a -> b [penwidth=2]
+    x:out:n -> y:s
+    subgraph cluster_1 { node [color=blue]; d; e [label=<<b>E</b>>] } -> f
+    a [label="multi" + "part"]
+    "long\
+name" -> a
+    NODE [fontsize=8]
+    g
+}
+'''
+
+
+@pytest.mark.parametrize('chunk_size', [3, 4096])
+def test_parse_dot(chunk_size):
+    '''Check statements, defaults, subgraphs, ports and strict edges'''
+    graph = parse(Graph(), io.StringIO(SOURCE), chunk_size=chunk_size, batch_size=2)
+    assert vars(graph.attrs) == dict(label='Say "hi"', rankdir='LR')
+    nodes = {node.attrs.name: vars(node.attrs) for node in graph.nodes}
+    assert list(nodes) == ['a', 'b', 'c', 'x', 'y', 'd', 'e', 'f', 'longname', 'g']
+    assert nodes['a'] == dict(shape='box', name='a', label='multipart')
+    assert nodes['e'] == dict(shape='box', color='blue', name='e', label='<<b>E</b>>')
+    assert nodes['f'] == dict(shape='box', name='f')
+    assert nodes['g'] == dict(shape='box', name='g', fontsize='8')
+    edges = [(edge.start.attrs.name, edge.end.attrs.name, vars(edge.attrs)) for edge in graph.edges]
+    assert edges == [
+        ('a', 'b', dict(color='red', penwidth='2')),
+        ('b', 'c', dict(color='red')),
+        ('x', 'y', dict(tailport='out:n', headport='s')),
+        ('d', 'f', dict()),
+        ('e', 'f', dict()),
+        ('longname', 'a', dict()),
+    ]
+    assert graph.nodes[0].out_degree == 1
+    assert graph.nodes[0].in_degree == 1
+
+
+def test_parse_dot_roundtrip(tmp_path):
+    '''Check that parsed output of dot writer produces the same output'''
+    graph = Graph(label='Round trip', rankdir='LR')
+    node = graph.node
+    a = node(label='Foo!', shape='box')
+    b = node(label='node', fontcolor='red', penwidth=1.5)
+    c = node(label='<<i>html</i>>')
+    d = node(label='Foo!', tooltip='quote " and \\" backslash')
+    a >> b >> c >> d >> a
+    graph.edge(a, c, label='-1.5', style='dashed')
+    source = ''.join(graph.iter_dot())
+    path = tmp_path / 'graph.dot'
+    path.write_text(source)
+    assert ''.join(Graph.from_dot(path).iter_dot()) == source
+    stream = io.BytesIO(source.encode('utf-8'))
+    assert ''.join(Graph.from_dot(stream).iter_dot()) == source
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3])
+def test_parse_dot_bytes(chunk_size):
+    '''Check that multibyte characters split between chunks are decoded'''
+    source = 'digraph { "узел" -> ß [label="café"] }'.encode('utf-8')
+    graph = parse(Graph(), io.BytesIO(source), chunk_size=chunk_size)
+    assert [node.attrs.name for node in graph.nodes] == ['узел', 'ß']
+    assert [vars(edge.attrs) for edge in graph.edges] == [dict(label='café')]
+
+
+@pytest.mark.parametrize('source, message', [
+    ('graph { a -- b }', 'undirected'),
+    ('digraph { a -> }', 'identifier'),
+    ('digraph { a [color=red }', 'identifier'),
+    ('digraph { a ', 'end of input'),
+    ('digraph { a = <b }', 'HTML'),
+    ('digraph { a ! b }', 'line 1'),
+])
+def test_parse_dot_errors(source, message):
+    '''Check that invalid input is reported'''
+    with pytest.raises(DotSyntaxError, match=message):
+        Graph.from_dot(io.StringIO(source))
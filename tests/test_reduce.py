@@ -0,0 +1,97 @@
+'''
+Check graph reduction passes
+'''
+
+
+import io
+import tracemalloc
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.reduce import coarsen, copy_graph
+
+
+def edge_list(graph):
+    return [(edge.start.attrs.label, edge.end.attrs.label) for edge in graph.edges]
+
+
+def test_merge_edges():
+    '''Check that parallel edges are merged with count and penwidth aggregates'''
+    graph = Graph()
+    a, b, c = graph.add_nodes(dict(label=list('abc')))
+    graph.add_edges([(a, b), (a, b, dict(penwidth=2)), (b, a), (a, b), (b, c, dict(penwidth=2)), (b, c)])
+    assert graph.merge_edges(count_attr='xlabel', scale_penwidth=True) == 3
+    assert edge_list(graph) == [('a', 'b'), ('b', 'a'), ('b', 'c')]
+    assert [vars(edge.attrs) for edge in graph.edges] == [
+        dict(xlabel='3', penwidth='3'),
+        dict(),
+        dict(penwidth='4', xlabel='2'),
+    ]
+    assert a.outgoing == [graph.edges[0]]
+    assert b.in_degree == 1
+    assert graph.merge_edges() == 0
+
+
+def test_transitive_reduction():
+    '''Check that implied edges are removed from acyclic graph'''
+    graph = Graph()
+    a, b, c, d, e = graph.add_nodes(dict(label=list('abcde')))
+    graph.add_edges([(a, b), (a, c), (a, d), (b, d), (c, d), (d, e), (a, e), (b, e), (c, e), (c, d)])
+    assert graph.transitive_reduction() == 5
+    assert edge_list(graph) == [('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'), ('d', 'e')]
+    assert e.incoming == [graph.edges[-1]]
+
+    chain = Graph()
+    nodes = chain.add_nodes(dict(label=[str(index) for index in range(5000)]))
+    chain.add_edges(zip(nodes, nodes[1:]))
+    chain.add_edges(zip(nodes, nodes[2:]))
+    assert chain.transitive_reduction() == 4998  # no recursion limit
+
+    a >> a
+    with pytest.raises(ValueError):
+        graph.transitive_reduction()
+    e >> a
+    with pytest.raises(ValueError):
+        graph.transitive_reduction()
+
+
+def test_transitive_reduction_memory():
+    '''Check that reachability of processed nodes is not kept for deep graphs'''
+    chain = Graph()
+    nodes = chain.add_nodes(dict(label=[str(index) for index in range(20000)]))
+    chain.add_edges(zip(nodes, nodes[1:]))
+    chain.add_edges(zip(nodes, nodes[2:]))
+    tracemalloc.start()
+    try:
+        assert chain.transitive_reduction() == 19998
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 20 * 2**20  # 55 MB if every bitset is kept
+
+
+def test_collapse_components():
+    '''Check that cycles are replaced with single nodes'''
+    graph = Graph()
+    a, b, c, d, e = graph.add_nodes(dict(label=list('abcde')))
+    graph.add_edges([(a, b), (b, c), (c, b), (c, d), (d, b), (d, e), (e, e)])
+    graph.edges[5].connector = d
+    collapsed = graph.collapse_components(label=lambda nodes: '+'.join(node.attrs.label for node in nodes))
+    assert collapsed == {b: [b, c, d]}
+    assert graph.nodes == [a, b, e]
+    assert edge_list(graph) == [('a', 'b+c+d'), ('b+c+d', 'e'), ('e', 'e')]
+    assert b.incoming == [graph.edges[0]]
+    assert c.outgoing == d.incoming == []
+    assert graph.edges[1].connector is b
+    assert 'bcd -> e' in graph.render()
+
+
+def test_copy_coarsen():
+    '''Check that copies are independent and nodes without labels can be coarsened'''
+    graph = Graph.from_dot(io.StringIO('digraph { rankdir=LR; a -> b -> a; b -> c }'))
+    duplicate = copy_graph(graph)
+    duplicate.attrs.splines = 'true'
+    assert vars(graph.attrs) == dict(rankdir='LR')
+    coarse = coarsen(graph)
+    assert [vars(node.attrs) for node in coarse.nodes] == [dict(name='a', label='a (+1)'), dict(name='c')]
+    assert len(graph.nodes) == 3
@@ -0,0 +1,232 @@
+'''
+Check rendering graphs to streams and files
+'''
+
+
+import asyncio
+import io
+import shutil
+import sys
+import pytest
+from textwrap import dedent
+from graphviz_managed import Graph
+from graphviz_managed import engine, metrics
+from graphviz_managed.cache import RenderCache
+from graphviz_managed.policy import RenderPolicy
+from graphviz_managed.reduce import coarsen
+
+
+requires_graphviz = pytest.mark.skipif(
+    shutil.which('dot') is None,
+    reason='Graphviz executables not available',
+)
+
+
+def sample_graph():
+    '''Small graph with some non-ASCII labels'''
+    graph = Graph(label='Streaming test')
+    a = graph.node(label='Привет')
+    b = graph.node(label='world')
+    a >> b >> a
+    return graph
+
+
+def test_write_text_stream():
+    '''Check that dot source may be written to text streams'''
+    graph = sample_graph()
+    stream = io.StringIO()
+    graph.write(stream)
+    assert stream.getvalue() == graph.render()
+
+
+def test_write_binary_stream():
+    '''Check that dot source may be written to binary streams'''
+    graph = sample_graph()
+    stream = io.BytesIO()
+    graph.write(stream)
+    assert not stream.closed
+    assert stream.getvalue().decode('utf-8') == graph.render()
+
+
+def test_iter_dot():
+    '''Check that dot source is generated line by line'''
+    graph = sample_graph()
+    lines = list(graph.iter_dot())
+    assert len(lines) == len(graph.render().splitlines())
+    assert all(line.endswith('\n') for line in lines)
+
+
+def test_render_dot_file(tmp_path):
+    '''Check rendering to dot file'''
+    graph = sample_graph()
+    output = tmp_path / 'graph.dot'
+    graph.render(output)
+    assert output.read_text() == graph.render()
+
+
+@requires_graphviz
+def test_render_svg_pipe(tmp_path):
+    '''Check that rendering via pipe leaves no intermediate files'''
+    graph = sample_graph()
+    output = tmp_path / 'graph.svg'
+    graph.render(output)
+    assert '<svg' in output.read_text()
+    assert list(tmp_path.iterdir()) == [output]
+
+
+@pytest.fixture
+def fake_engine(tmp_path):
+    '''Executable that mimics Graphviz command line: echoes its input (slowly unless named fast-*)'''
+    script = tmp_path / 'fake-dot'
+    script.write_text(dedent(f'''\
+        #!{sys.executable}
+        import sys, time
+        source = sys.stdin.buffer.read()
+        if b'sleep' in source and 'fast-' not in sys.argv[0]:
+            time.sleep(10)
+        if b'fail' in source:
+            sys.exit('syntax error')
+        fmt = sys.argv[1][2:].encode()
+        result = fmt + b':' + source
+        if len(sys.argv) > 2:
+            with open(sys.argv[2][2:], 'wb') as f:
+                f.write(result)
+        else:
+            sys.stdout.buffer.write(result)
+        '''))
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_pipe(fake_engine, tmp_path):
+    '''Check feeding dot source to engine process'''
+    graph = sample_graph()
+    expected = b'svg:' + graph.render().encode('utf-8')
+    assert engine.pipe(graph.iter_dot(), 'svg', engine=fake_engine) == expected
+    output = tmp_path / 'output.svg'
+    assert engine.pipe(graph.iter_dot(), 'svg', output=output, engine=fake_engine) is None
+    assert output.read_bytes() == expected
+    with pytest.raises(RuntimeError, match='syntax error'):
+        engine.pipe(['fail'], 'svg', engine=fake_engine)
+
+
+def test_pipe_async(fake_engine, tmp_path):
+    '''Check asyncio version of engine pipe'''
+    graph = sample_graph()
+    expected = b'svg:' + graph.render().encode('utf-8')
+    async def render_all():
+        return await asyncio.gather(*(
+            engine.pipe_async(graph.iter_dot(), 'svg', engine=fake_engine)
+            for _ in range(5)
+        ))
+    assert asyncio.run(render_all()) == [expected] * 5
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(engine.pipe_async(['sleep'], 'svg', engine=fake_engine, timeout=0.5))
+    with pytest.raises(RuntimeError, match='syntax error'):
+        asyncio.run(engine.pipe_async(['fail'], 'svg', engine=fake_engine))
+
+
+def test_pipe_async_limit(fake_engine, monkeypatch):
+    '''Check that concurrency limit may be changed and provided per call'''
+    async def render():
+        await engine.pipe_async(['a'], 'svg', engine=fake_engine)
+        monkeypatch.setattr(engine, 'ASYNC_LIMIT', 0)  # no process can start now
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(engine.pipe_async(['b'], 'svg', engine=fake_engine), 0.3)
+        busy = asyncio.Semaphore(1)
+        await engine.pipe_async(['c'], 'svg', engine=fake_engine, semaphore=busy)
+        async with busy:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(sample_graph().render_async(semaphore=busy), 0.3)
+    asyncio.run(render())
+
+
+def test_render_async_dot(tmp_path):
+    '''Check that async rendering to dot does not require Graphviz'''
+    graph = sample_graph()
+    source = asyncio.run(graph.render_async(fmt='dot'))
+    assert source.decode('utf-8') == graph.render()
+    output = tmp_path / 'graph.dot'
+    asyncio.run(graph.render_async(output))
+    assert output.read_text() == graph.render()
+
+
+@requires_graphviz
+def test_render_async_svg():
+    '''Check that async rendering matches synchronous one'''
+    graph = sample_graph()
+    svg = asyncio.run(graph.render_async())
+    assert svg == engine.pipe(graph.iter_dot(), 'svg')
+
+
+def test_render_policy(fake_engine, tmp_path):
+    '''Check engine selection, timeouts and fallbacks'''
+    fast = tmp_path / 'fast-dot'
+    fast.symlink_to(fake_engine)
+    fast = str(fast)
+    graph = Graph()
+    a = graph.node(label='sleep')
+    b = graph.node(label='b')
+    a >> b >> a
+    output = tmp_path / 'policy.svg'
+
+    policy = RenderPolicy(engines=[(1, None, fast), (None, None, fake_engine)], timeout=0.5, fallback=[coarsen])
+    assert policy.choose(graph) == fake_engine
+    graph.render(output, policy=policy)
+    report = graph.last_render_report
+    assert (report.ok, report.fallback, report.coarsened, report.engine) == (True, True, True, fast)
+    assert [attempt.error is None for attempt in report.attempts] == [False, True]
+    assert output.read_text().startswith('svg:digraph')
+    assert len(graph.nodes) == 2 and len(graph.edges) == 2
+
+    graph.render(output, policy=RenderPolicy(engines=[(None, None, fake_engine)], timeout=0.5, fallback=[fast]))
+    report = graph.last_render_report
+    assert (report.ok, report.coarsened, report.engine) == (True, False, fast)
+
+    cache = RenderCache()
+    graph.render(output, policy=policy, cache=cache)
+    assert graph.last_render_report.fallback
+    assert graph.last_render_stats.cached is False
+    graph.render(output, policy=policy, cache=cache)
+    assert graph.last_render_stats.cached is False
+
+    with pytest.raises(TimeoutError):
+        graph.render(output, policy=RenderPolicy(engines=[(None, None, fake_engine)], timeout=0.2))
+    assert not graph.last_render_report.ok
+
+
+def test_render_stats(fake_engine, tmp_path, caplog):
+    '''Check per-phase render metrics, render hooks and logging'''
+    graph = sample_graph()
+    reported = []
+    hook = metrics.add_render_hook(lambda graph, stats: reported.append(stats))
+    try:
+        source = graph.render()
+        stats = graph.last_render_stats
+        assert (stats.nodes, stats.edges, stats.fmt, stats.engine) == (2, 2, 'dot', None)
+        assert stats.dot_bytes == stats.output_bytes == len(source.encode('utf-8'))
+        assert list(stats.phases) == ['styles', 'translate', 'serialize']
+
+        output = tmp_path / 'graph.svg'
+        with caplog.at_level('INFO', logger='graphviz_managed.logging'):
+            graph.render(output, policy=RenderPolicy(engines=[(None, None, fake_engine)]))
+        stats = graph.last_render_stats
+        assert stats.engine == fake_engine
+        assert stats.dot_bytes == len(source.encode('utf-8'))
+        assert stats.output_bytes == output.stat().st_size
+        assert set(stats.phases) == {'styles', 'translate', 'serialize', 'layout'}
+        assert all(seconds >= 0 for seconds in stats.phases.values())
+        assert stats.seconds >= sum(stats.phases.values())
+        record, = [record for record in caplog.records if hasattr(record, 'render_stats')]
+        assert record.render_stats == stats.as_dict()
+        assert record.render_stats['layout_seconds'] == stats.phases['layout']
+
+        with pytest.raises(TimeoutError):
+            graph.edge(graph.nodes[0], graph.node(label='sleep'))
+            graph.render(output, policy=RenderPolicy(engines=[(None, None, fake_engine)], timeout=0.2))
+        assert isinstance(graph.last_render_stats.error, TimeoutError)
+        assert [stats.error is None for stats in reported] == [True, True, False]
+    finally:
+        metrics.remove_render_hook(hook)
+    graph.render()
+    assert len(reported) == 3
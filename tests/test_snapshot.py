@@ -0,0 +1,73 @@
+'''
+Check binary graph snapshots
+'''
+
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.custom import WrapLongLabelNode
+from graphviz_managed.style import nodes
+
+
+def sample_graph():
+    graph = Graph(label='Snapshot', rankdir='LR', node_attrs=dict(shape='box'))
+    a = graph.node(label='a', color='red')
+    b = graph.node(cls=WrapLongLabelNode, label='Long label that will be wrapped into multiple lines')
+    c = graph.node(label='c', color='red')
+    a >> b >> c
+    c << a
+    graph.edge(c, c, style='dashed')
+    graph.style(nodes(color='red'), fontcolor='red')
+    return graph
+
+
+def test_snapshot_roundtrip(tmp_path):
+    '''Check that loaded graph produces the same output and adjacency'''
+    graph = sample_graph()
+    path = tmp_path / 'graph.snap'
+    graph.save(path)
+    loaded = Graph.load(path)
+    assert list(loaded.iter_dot()) == list(graph.iter_dot())
+    assert [type(node) for node in loaded.nodes] == [type(node) for node in graph.nodes]
+    a, b, c = loaded.nodes
+    assert vars(a.attrs) == dict(shape='box', label='a', color='red', fontcolor='red')
+    assert a.attrs._keys is c.attrs._keys
+    assert a.outgoing == [loaded.edges[0], loaded.edges[2]]
+    assert c.incoming == loaded.edges[1:]
+    assert c.outgoing == [loaded.edges[3]]
+    assert loaded.edges[2].connector is a
+    assert loaded.edges[0].connector is b
+    a.attrs.color = 'blue'
+    assert c.attrs.color == 'red'
+    d = loaded.node(label='d')
+    c >> d
+    assert d.in_degree == 1
+
+
+def test_snapshot_diagrams(tmp_path):
+    '''Check that attributes of member subclasses survive the round trip'''
+    pytest.importorskip('diagrams')
+    from graphviz_managed.diagrams import Diagram
+    diag = Diagram(label='Snapshot')
+    diag.node(kind='aws.network.ELB', label='lb') >> diag.node(kind='aws.compute.EC2', label='web')
+    path = tmp_path / 'diag.snap'
+    diag.save(path)
+    loaded = Graph.load(path)
+    assert type(loaded) is Diagram
+    assert [node.kind for node in loaded.nodes] == ['diagrams.aws.network.ELB', 'diagrams.aws.compute.EC2']
+
+
+def test_snapshot_errors(tmp_path):
+    '''Check unsupported values and invalid files'''
+    path = tmp_path / 'bad.snap'
+    path.write_bytes(b'digraph {}')
+    with pytest.raises(ValueError, match='not a graph snapshot'):
+        Graph.load(path)
+
+    class CustomNode(WrapLongLabelNode):
+        pass
+    graph = Graph()
+    node = graph.node(cls=CustomNode, label='x')
+    node.payload = 42
+    with pytest.raises(TypeError, match='payload'):
+        graph.save(path)
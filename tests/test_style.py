@@ -0,0 +1,73 @@
+'''
+Check selector based bulk styling
+'''
+
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.custom import WrapLongLabelNode
+from graphviz_managed.style import RuleSheet, nodes, edges
+
+
+def sample_graph():
+    graph = Graph()
+    a = graph.node(label='a', shape='box')
+    b = graph.node(label='b', shape='box', rank=1)
+    c = graph.node(cls=WrapLongLabelNode, label='c')
+    a >> b >> c
+    a >> c
+    return graph, a, b, c
+
+
+def test_style_selectors():
+    '''Check matching by attributes, degree, class and edge endpoints'''
+    graph, a, b, c = sample_graph()
+    graph.style(nodes(shape='box'), color='red')
+    graph.style(nodes(rank=1), color='blue')
+    graph.style(nodes(rank=None, in_degree=lambda degree: degree > 0), style='bold')
+    graph.style(nodes(cls=WrapLongLabelNode), shape='note')
+    graph.style(edges(start=a), style='dashed')
+    graph.style(edges(end=nodes(shape='box')), color='gray')
+    assert not hasattr(a.attrs, 'color')  # deferred until render
+    assert graph.apply_styles() == 5
+    assert vars(a.attrs) == dict(label='a', shape='box', color='red')
+    assert vars(b.attrs) == dict(label='b', shape='box', rank='1', color='blue')
+    assert vars(c.attrs) == dict(label='c', style='bold', shape='note')
+    styles = {(edge.start.attrs.label, edge.end.attrs.label): vars(edge.attrs) for edge in graph.edges}
+    assert styles == {
+        ('a', 'b'): dict(style='dashed', color='gray'),
+        ('b', 'c'): dict(),
+        ('a', 'c'): dict(style='dashed'),
+    }
+
+
+def test_style_matches_original_attrs():
+    '''Check that rules do not see the changes made by earlier rules'''
+    graph, a, b, c = sample_graph()
+    graph.style(nodes(shape='box'), shape='ellipse')
+    graph.style(nodes(shape='ellipse'), color='green')
+    graph.style(nodes(label='b'), shape=None)
+    graph.render()
+    assert vars(a.attrs) == dict(label='a', shape='ellipse')
+    assert vars(b.attrs) == dict(label='b', rank='1')
+    assert graph.apply_styles() == 0
+
+
+def test_rule_sheet():
+    '''Check that rule sheets can be reused for many graphs'''
+    sheet = RuleSheet([
+        (nodes(out_degree=0), dict(peripheries=2)),
+        (edges(), dict(arrowhead='vee')),
+    ])
+    sheet.add(nodes(label='c'), peripheries=3)
+    for _ in range(2):
+        graph, a, b, c = sample_graph()
+        graph.style(sheet)
+        assert 'peripheries=3' in graph.render()
+        assert c.attrs.peripheries == '3'
+        assert all(edge.attrs.arrowhead == 'vee' for edge in graph.edges)
+    with pytest.raises(ValueError):
+        graph.style(sheet, color='red')
+    with pytest.raises(ValueError):
+        graph.style(edges(start=edges()), color='red')
+        graph.apply_styles()
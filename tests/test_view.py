@@ -0,0 +1,99 @@
+'''
+Check lightweight views of graph slices
+'''
+
+
+import pytest
+from graphviz_managed import Graph
+from graphviz_managed.reduce import copy_graph
+from graphviz_managed.style import edges, nodes
+
+
+def sample_graph():
+    graph = Graph(rankdir='LR')
+    a, b, c, d, e = (graph.node(label=letter) for letter in 'abcde')
+    a >> b >> c >> d
+    e >> c
+    return graph
+
+
+def test_view_members():
+    '''Check that views share members and keep parent order'''
+    graph = sample_graph()
+    a, b, c, d, e = graph.nodes
+    view = graph.view([d, b, c])
+    assert list(view.nodes) == [b, c, d]
+    assert [(edge.start, edge.end) for edge in view.edges] == [(b, c), (c, d)]
+    assert view.nodes[0] is graph.nodes[1]
+    assert view.sources() == [b] and view.sinks() == [d]
+    assert list(graph.filter(lambda node: node.attrs.label in 'ae').nodes) == [a, e]
+    with pytest.raises(ValueError):
+        graph.view([Graph().node(label='x')])
+    with pytest.raises(TypeError):
+        view.node(label='x')
+
+
+def test_view_around():
+    '''Check k-hop neighbourhoods'''
+    graph = sample_graph()
+    a, b, c, d, e = graph.nodes
+    assert list(graph.around(c).nodes) == [b, c, d, e]
+    assert list(graph.around(c, hops=2, direction='in').nodes) == [a, b, c, e]
+    assert list(graph.around([a, e], hops=0).nodes) == [a, e]
+    assert list(graph.around(a, hops=10, direction='out').nodes) == [a, b, c, d]
+    with pytest.raises(ValueError):
+        graph.around(a, direction='up')
+
+
+def test_view_overlay():
+    '''Check that overlays and styles do not modify parent graph'''
+    graph = sample_graph()
+    a, b, c, d, e = graph.nodes
+    view = graph.view([b, c], label='slice')
+    view.overlay(b, color='red')
+    view.style(edges(), style='dashed')
+    source = view.render()
+    assert 'label=slice' in source and 'rankdir=LR' in source
+    assert 'b [label=b color=red]' in source
+    assert 'b -> c [style=dashed]' in source
+    assert 'c -> d' not in source
+    assert not hasattr(b.attrs, 'color')
+    assert 'red' not in graph.render() and 'dashed' not in graph.render()
+
+    b.attrs.shape = 'box'  # parent changes are visible
+    view.overlay(b, color=None, penwidth=2)
+    assert 'b [label=b penwidth=2 shape=box]' in view.render()
+    assert vars(view.attrs_of(b)) == dict(label='b', shape='box', penwidth='2')
+
+    nested = view.view([b])
+    nested.overlay(b, color='blue')
+    assert 'b [label=b color=blue penwidth=2 shape=box]' in nested.render()
+    assert vars(copy_graph(nested).nodes[0].attrs) == vars(nested.attrs_of(b))
+
+
+def test_view_endpoint_styles():
+    '''Check that endpoint selectors match only edges of the view'''
+    graph = sample_graph()
+    a, b, c, d, e = graph.nodes
+    view = graph.view([b, c])
+    view.style(edges(start=nodes(label='b')), color='red')
+    view.style(edges(end=nodes(label='c')), style='bold')
+    view.style(edges(start=nodes(label='c')), color='blue')  # c -> d is not in view
+    source = view.render()
+    assert 'b -> c [color=red style=bold]' in source
+    assert 'blue' not in source
+
+
+def test_view_save(tmp_path):
+    '''Check that views are saved as standalone graphs'''
+    graph = sample_graph()
+    a, b, c, d, e = graph.nodes
+    view = graph.view([b, c])
+    view.overlay(c, color='red')
+    view.save(tmp_path / 'view.snapshot')
+    loaded = Graph.load(tmp_path / 'view.snapshot')
+    assert type(loaded) is Graph
+    assert loaded.render() == view.render()
+    standalone = view.materialize()
+    standalone.node(label='x')
+    assert len(view.nodes) == 2 and len(graph.nodes) == 5
@@ -4,9 +4,9 @@ Tests for Node object that wraps long labels automatically
 
 
 import pytest
-from textwrap import dedent
+from textwrap import dedent, wrap
 from graphviz_managed import Graph
-from graphviz_managed.custom import WrapLongLabelNode
+from graphviz_managed.custom import WrapLongLabelNode, wrap_label
 
 
 def test_wrap_labels():
@@ -27,3 +27,40 @@ def test_wrap_labels():
             r'label="CantWrapSpecialCamelCaseWordsWithoutSpaces\nbut can wrap\nelsewhere"',
             ):
         assert line in render
+
+
+@pytest.mark.parametrize('label', [
+    'Long label that will be wrapped into multiple lines',
+    '  leading   and trailing   spaces in a long label  ',
+    'CantWrapSpecialCamelCaseWordsWithoutSpaces but can wrap elsewhere',
+    'hyphenated-words-are-split-by-textwrap at hyphens',
+    'Überlange Beschriftung mit Umlauten wird umgebrochen',
+    'tabs\tand\nnewlines are whitespace too',
+])
+def test_wrap_label(label):
+    '''Check that fast wrapping matches textwrap'''
+    for width in (5, 10, 20):
+        assert wrap_label(label, width) == r'\n'.join(wrap(label, width=width, break_long_words=False))
+
+
+class DeferredNode(WrapLongLabelNode):
+    __slots__ = ()
+    DEFER_WRAPPING = True
+
+
+def test_deferred_wrapping():
+    '''Check that deferred labels are wrapped once, right before rendering'''
+    graph = Graph(node_cls=DeferredNode)
+    a = graph.node(label='Long label that will be wrapped')
+    assert a.attrs.label == 'Long label that will be wrapped'
+    a.attrs.label += ' into multiple lines'  # post-processing sees original text
+    assert r'label="Long label that will\nbe wrapped into\nmultiple lines"' in graph.render()
+    assert a.attrs.label == r'Long label that will\nbe wrapped into\nmultiple lines'
+    assert r'label="Long label that will\nbe wrapped into\nmultiple lines"' in graph.render()  # not wrapped twice
+
+    plain = Graph()
+    b = plain.node(cls=DeferredNode, label='Long label that will be wrapped')
+    c, = plain.add_nodes([dict(label='Another long label to be wrapped')], cls=DeferredNode)
+    view = plain.view([b, c])
+    assert r'label="Long label that will\nbe wrapped"' in view.render()
+    assert c.attrs.label == r'Another long label\nto be wrapped'